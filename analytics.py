@@ -0,0 +1,186 @@
+"""
+数据分析模块
+使用pandas向量化计算租售比、按磨损度排名、普通/暗金版价差和租售比最高的商品
+"""
+
+import glob
+import os
+import sys
+from typing import Iterable, List, Union
+
+import numpy as np
+import pandas as pd
+
+import config
+from columnar import COLUMNAR_SUFFIXES, read_columnar
+from data_processor import CSV_FIELDNAMES, PriceRecord, RecordBatch, add_rent_ratio
+
+
+# 结果CSV列名 -> DataFrame列名
+COLUMN_MAP = dict(zip(CSV_FIELDNAMES, ['item_name', 'version', 'wear_level', 'sell_price', 'rent_price', 'rent_ratio']))
+
+
+def load_results(paths: Union[str, Iterable[str]] = None) -> pd.DataFrame:
+    """
+    读取一个或多个结果文件（CSV，或COLUMNAR_OUTPUT写出的.parquet/.arrows列式文件，后者不需要解析文本）
+    
+    Args:
+        paths: 文件路径、通配符或路径列表，默认读取config.OUTPUT_DIR下所有result_*.csv
+    
+    Returns:
+        DataFrame，列为item_name, version, wear_level, sell_price, rent_price, rent_ratio, source
+    
+    Raises:
+        FileNotFoundError: 文件路径或通配符没有匹配到任何文件
+    """
+    if paths is None:
+        paths = os.path.join(config.OUTPUT_DIR, 'result_*.csv')
+    if isinstance(paths, str):
+        pattern = paths
+        paths = sorted(glob.glob(pattern))
+        if not paths:
+            raise FileNotFoundError(f"没有找到结果文件: {pattern}（请先运行爬虫，或指定结果文件路径）")
+    
+    frames = []
+    for path in paths:
+        if path.endswith(tuple(COLUMNAR_SUFFIXES.values())):
+            df = read_columnar(path)[list(COLUMN_MAP.values())[:5]]
+        else:
+            df = pd.read_csv(
+                path,
+                encoding='utf-8-sig',
+                usecols=CSV_FIELDNAMES[:5],
+                dtype={'商品名': 'string', '版本': 'category', '磨损度': 'category',
+                       '售价': 'float64', '租价(天)': 'float64'},
+            ).rename(columns=COLUMN_MAP)
+        df['source'] = os.path.basename(path)
+        frames.append(df)
+    
+    if not frames:
+        return _empty_frame()
+    
+    df = pd.concat(frames, ignore_index=True)
+    return add_rent_ratio(df)
+
+
+def records_to_frame(records: Union[RecordBatch, List[PriceRecord]]) -> pd.DataFrame:
+    """
+    将爬虫内存中的记录转换为DataFrame
+    
+    Args:
+        records: RecordBatch（整批按列转换）或PriceRecord列表
+    
+    Returns:
+        DataFrame，列与load_results一致（不含source）
+    """
+    if not records:
+        return _empty_frame()
+    if isinstance(records, RecordBatch):
+        return add_rent_ratio(records.to_frame())
+    
+    df = pd.DataFrame({
+        'item_name': [r.item_name for r in records],
+        'version': pd.Categorical([r.version for r in records]),
+        'wear_level': pd.Categorical([r.wear_level for r in records]),
+        'sell_price': np.array([r.sell_price for r in records], dtype='float64'),
+        'rent_price': np.array([r.rent_price for r in records], dtype='float64'),
+    })
+    return add_rent_ratio(df)
+
+
+def _empty_frame() -> pd.DataFrame:
+    """返回空的结果DataFrame"""
+    return pd.DataFrame({col: pd.Series(dtype='float64') for col in COLUMN_MAP.values()})
+
+
+def latest_observations(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    每个(商品, 版本, 磨损度)只保留最后一次观测（load_results按文件名即采集时间顺序读取，后读取的为最新）
+    
+    多个结果文件一起分析时，排名和透视只使用最新一次运行的价格，不会重复出现同一饰品，
+    也不会把不同运行的售价和租价拼在同一行。
+    
+    Args:
+        df: 结果DataFrame
+    
+    Returns:
+        去重后的DataFrame
+    """
+    return df.drop_duplicates(['item_name', 'version', 'wear_level'], keep='last')
+
+
+def rank_by_wear(df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
+    """
+    每个磨损度内按租售比从高到低排名（多次运行的结果只取每个饰品的最新一次）
+    
+    Args:
+        df: 结果DataFrame
+        top_n: 每个磨损度保留前N名
+    
+    Returns:
+        含rank列的DataFrame，按磨损度、排名排序
+    """
+    ranked = latest_observations(df).dropna(subset=['rent_ratio']).copy()
+    ranked['rank'] = ranked.groupby('wear_level', observed=True)['rent_ratio'].rank(method='first', ascending=False)
+    ranked = ranked[ranked['rank'] <= top_n]
+    return ranked.sort_values(['wear_level', 'rank']).reset_index(drop=True)
+
+
+def version_spread(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    比较同一商品同一磨损度的普通版和暗金版（多次运行的结果只取每个饰品的最新一次）
+    
+    Args:
+        df: 结果DataFrame
+    
+    Returns:
+        每行一个(商品, 磨损度)，包含两个版本的售价、租价、租售比及暗金版溢价（倍数）
+    """
+    wide = latest_observations(df).pivot_table(
+        index=['item_name', 'wear_level'],
+        columns='version',
+        values=['sell_price', 'rent_price', 'rent_ratio'],
+        aggfunc='first',
+        observed=True,
+        dropna=False,
+    )
+    wide.columns = [f'{value}_{version}' for value, version in wide.columns]
+    wide = wide.reset_index()
+    
+    if {'sell_price_普通', 'sell_price_暗金'} <= set(wide.columns):
+        wide['sell_premium'] = wide['sell_price_暗金'] / wide['sell_price_普通'].where(wide['sell_price_普通'] > 0)
+    if {'rent_ratio_普通', 'rent_ratio_暗金'} <= set(wide.columns):
+        wide['ratio_spread'] = wide['rent_ratio_暗金'] - wide['rent_ratio_普通']
+    return wide
+
+
+def top_opportunities(df: pd.DataFrame, top_n: int = 20, min_sell_price: float = 0) -> pd.DataFrame:
+    """
+    租售比最高的N条记录（多次运行的结果只取每个饰品的最新一次）
+    
+    Args:
+        df: 结果DataFrame
+        top_n: 返回条数
+        min_sell_price: 最低售价，过滤掉价格过低的饰品
+    
+    Returns:
+        按租售比从高到低排序的DataFrame
+    """
+    df = latest_observations(df)
+    candidates = df[(df['sell_price'] >= min_sell_price) & df['rent_ratio'].notna()]
+    return candidates.nlargest(top_n, 'rent_ratio').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # 分析指定的结果文件（默认output目录下所有结果）
+    try:
+        results = load_results(sys.argv[1] if len(sys.argv) > 1 else None)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    print(f"读取到 {len(results)} 条记录")
+    pd.set_option('display.unicode.east_asian_width', True)
+    print("\n租售比最高的商品:")
+    print(top_opportunities(results).to_string())
+    print("\n各磨损度排名:")
+    print(rank_by_wear(results, top_n=5).to_string())
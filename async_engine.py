@@ -0,0 +1,276 @@
+"""
+异步采集引擎
+页面访问、价格解析、结果写入分为三个阶段，由协程通过有界asyncio.Queue连接：
+阻塞的DrissionPage调用在线程池中执行，访问间隔用asyncio.sleep等待，解析或写入变慢时不阻塞页面访问
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+
+import config
+from data_processor import Item, RecordBatch, build_url, iter_items_csv
+from planner import ScrapePlan, iter_plan
+from scraper import BUTTON_TEXTS_JS, YoupinScraper
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncScrapeEngine:
+    """
+    异步采集引擎
+    
+    读取协程为每个商品创建采集任务并按顺序放入写入队列（队列容量限制同时在途的商品数）；
+    商品任务按templateId向访问队列提交页面，等待解析结果组装记录：
+        访问协程（每个标签页一个）：在线程池中打开页面、等待内容、取回按钮文本 -> 解析队列
+        解析协程：解析价格、记录页面结果、写入进度日志和页面缓存，唤醒等待该页面的商品任务
+        写入协程（唯一）：按商品顺序取出记录，在单独的线程中写入结果文件和价格历史库
+    并发数由ASYNC_CONCURRENCY一个参数决定（标签页/访问协程数和解析协程数）。
+    复用YoupinScraper的连接、去重、重试、缓存、指标和统计逻辑。
+    """
+    
+    def __init__(self, scraper: YoupinScraper = None, concurrency: int = None):
+        """
+        Args:
+            scraper: 使用的爬虫对象，默认新建一个
+            concurrency: 并发数，默认使用config.ASYNC_CONCURRENCY
+        """
+        self.scraper = scraper or YoupinScraper()
+        self.concurrency = max(1, config.ASYNC_CONCURRENCY if concurrency is None else concurrency)
+        # 本次运行的页面结果（LRU），同一页面只访问一次，其他商品等待同一个Future
+        self._pages: OrderedDict = OrderedDict()
+        self._fetch_queue: Optional[asyncio.Queue] = None
+        self._parse_queue: Optional[asyncio.Queue] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._browser_executor: Optional[ThreadPoolExecutor] = None
+        self._write_executor: Optional[ThreadPoolExecutor] = None
+    
+    async def run(self, items_csv: str = None, resume: bool = False,
+                  output_file: str = None, checkpoint_file: str = None) -> str:
+        """
+        运行一次采集
+        
+        Args:
+            items_csv: 输入CSV文件路径
+            resume: 是否从进度日志继续上次中断的采集
+            output_file: 输出文件路径，默认在config.OUTPUT_DIR下按时间生成
+            checkpoint_file: 进度日志路径，默认使用config.CHECKPOINT_FILE
+        
+        Returns:
+            输出文件路径
+        """
+        loop = asyncio.get_running_loop()
+        scraper = self.scraper
+        
+        plan = ScrapePlan()
+        items = iter_plan(iter_items_csv(items_csv), plan)
+        first_item = await loop.run_in_executor(None, next, items, None)
+        if first_item is None:
+            logger.error("没有找到商品数据")
+            return ""
+        
+        if not await loop.run_in_executor(
+                None, scraper._start_run, resume, output_file, checkpoint_file, self.concurrency):
+            return ""
+        
+        tabs = scraper.tabs or [scraper.page]
+        self._pages = OrderedDict()
+        self._fetch_queue = asyncio.Queue(maxsize=self.concurrency)
+        self._parse_queue = asyncio.Queue(maxsize=self.concurrency)
+        self._write_queue = asyncio.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        self._browser_executor = ThreadPoolExecutor(max_workers=len(tabs), thread_name_prefix='fetch')
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='write')
+        logger.info(f"异步引擎: {len(tabs)} 个访问协程, {self.concurrency} 个解析协程")
+        
+        fetchers = [asyncio.create_task(self._fetch_worker(tab)) for tab in tabs]
+        parsers = [asyncio.create_task(self._parse_worker()) for _ in range(self.concurrency)]
+        writer = asyncio.create_task(self._write_worker())
+        try:
+            await self._read_items(items, first_item)
+            await writer
+            for _ in fetchers:
+                await self._fetch_queue.put(None)
+            await asyncio.gather(*fetchers)
+            for _ in parsers:
+                await self._parse_queue.put(None)
+            await asyncio.gather(*parsers)
+            
+            # 失败页面在主流程结束后按指数退避重试
+            await loop.run_in_executor(self._browser_executor, scraper._retry_stage)
+        finally:
+            for task in fetchers + parsers + [writer]:
+                task.cancel()
+            self._browser_executor.shutdown(wait=True)
+            self._write_executor.shutdown(wait=True)
+            scraper._close_run()
+        
+        return scraper._finish_run(plan)
+    
+    async def _read_items(self, items: Iterator[Item], first_item: Item):
+        """读取协程：逐个商品创建采集任务，按顺序放入写入队列（队列满时等待）"""
+        loop = asyncio.get_running_loop()
+        item = first_item
+        count = 0
+        while item is not None:
+            count += 1
+            logger.info(f"处理商品 [{count}]: {item.name}")
+            await self._write_queue.put((item, asyncio.create_task(self._scrape_item(item))))
+            item = await loop.run_in_executor(None, next, items, None)
+        await self._write_queue.put(None)
+    
+    async def _scrape_item(self, item: Item) -> RecordBatch:
+        """商品任务：并发获取各版本的售价和租价，组装记录批"""
+        scraper = self.scraper
+        versions = scraper._item_versions(item)
+        results = await asyncio.gather(*(self._version_prices(template_id) for _, template_id in versions))
+        
+        records = RecordBatch()
+        for (version_name, template_id), (sell_prices, rent_prices) in zip(versions, results):
+            scraper._build_records(records, item.name, version_name, sell_prices, rent_prices)
+            scraper._register_row(template_id, item.name, version_name)
+        return records
+    
+    async def _version_prices(self, template_id: str) -> Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]]]:
+        """获取一个templateId的售价和租价（售价页面没有数据时省略租价页面）"""
+        sell_prices = await self._get_prices(template_id, config.LIST_TYPE_SELL)
+        if not self.scraper._should_fetch_rent(sell_prices):
+            return sell_prices, {}
+        return sell_prices, await self._get_prices(template_id, config.LIST_TYPE_RENT)
+    
+    async def _get_prices(self, template_id: str, list_type: int) -> Dict[str, Optional[float]]:
+        """
+        获取页面价格：本次运行已提交过的页面等待同一结果，进度日志或缓存中有的直接返回，
+        否则提交到访问队列
+        """
+        loop = asyncio.get_running_loop()
+        scraper = self.scraper
+        key = (template_id, list_type)
+        
+        future = self._pages.get(key)
+        if future is not None:
+            self._pages.move_to_end(key)
+            logger.debug(f"本次运行已采集过: templateId={template_id}, listType={list_type}")
+            scraper.metrics.inc('dedup_hits')
+            return await future
+        
+        future = loop.create_future()
+        self._pages[key] = future
+        if len(self._pages) > config.PAGE_RESULTS_MAX:
+            self._pages.popitem(last=False)
+        with scraper._lock:
+            scraper.pages_loaded += 1
+        
+        prices = await loop.run_in_executor(None, scraper._stored_prices, template_id, list_type)
+        if prices is not None:
+            future.set_result(prices)
+        else:
+            await self._fetch_queue.put((template_id, list_type, future))
+        return await future
+    
+    async def _fetch_worker(self, tab):
+        """访问协程：在线程池中打开页面并取回按钮文本，放入解析队列后按节奏等待"""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._fetch_queue.get()
+            if job is None:
+                return
+            template_id, list_type, future = job
+            result = await loop.run_in_executor(self._browser_executor, self._fetch_page, tab, template_id, list_type)
+            await self._parse_queue.put((template_id, list_type, future, result))
+            
+            # 每个标签页独立控制节奏，等待期间不占用线程
+            with self.scraper.metrics.timer('delay'):
+                await asyncio.sleep(self.scraper.next_delay())
+    
+    def _fetch_page(self, tab, template_id: str, list_type: int) -> Tuple[str, object]:
+        """
+        打开页面并取回磨损度按钮文本（在线程池中执行）
+        
+        Returns:
+            ('texts', 按钮文本列表)、('empty', None)、('error', 异常)；
+            使用HTTP后端或网络响应捕获时直接返回('prices', 价格字典)
+        """
+        scraper = self.scraper
+        if scraper.session_backend is not None or config.USE_NETWORK_CAPTURE:
+            return 'prices', scraper.get_prices_from_page(template_id, list_type, tab)
+        
+        url = build_url(template_id, list_type)
+        try:
+            logger.info(f"访问页面: {url}")
+            if scraper._open_page(tab, template_id, list_type, url) == 'empty':
+                return 'empty', None
+            return 'texts', tab.run_js(BUTTON_TEXTS_JS) or []
+        except Exception as e:
+            return 'error', e
+    
+    async def _parse_worker(self):
+        """解析协程：解析价格并记录页面结果，写入进度日志和页面缓存后唤醒等待的商品任务"""
+        loop = asyncio.get_running_loop()
+        scraper = self.scraper
+        while True:
+            job = await self._parse_queue.get()
+            if job is None:
+                return
+            template_id, list_type, future, (kind, payload) = job
+            prices = {wear: None for wear in config.WEAR_LEVELS.keys()}
+            try:
+                if kind == 'prices':
+                    prices = payload
+                elif kind == 'empty':
+                    scraper._report_no_listings(template_id, list_type)
+                elif kind == 'error':
+                    scraper._page_error(template_id, list_type, payload)
+                else:
+                    with scraper.metrics.timer('parse'):
+                        prices = scraper._prices_from_button_texts(payload)
+                    scraper._check_prices(template_id, list_type, prices)
+                await loop.run_in_executor(None, scraper._remember_prices, template_id, list_type, prices)
+            except Exception as e:
+                logger.error(f"解析价格时出错: {e}")
+            finally:
+                if not future.done():
+                    future.set_result(prices)
+    
+    async def _write_worker(self):
+        """写入协程：按商品顺序等待采集任务，在单独的线程中写入结果"""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._write_queue.get()
+            if job is None:
+                return
+            item, task = job
+            try:
+                records = await task
+            except Exception as e:
+                logger.error(f"处理商品 {item.name} 时出错: {e}")
+                continue
+            try:
+                await loop.run_in_executor(self._write_executor, self.scraper._write_records, records)
+            except Exception as e:
+                logger.error(f"写入结果时出错: {e}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="CS2饰品价格爬虫 - 异步采集引擎")
+    parser.add_argument("items_csv", nargs="?", default=None, help="输入CSV文件路径（默认使用config.INPUT_CSV）")
+    parser.add_argument("--resume", action="store_true", help="从进度日志继续上次中断的采集")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"并发数（默认使用config.ASYNC_CONCURRENCY={config.ASYNC_CONCURRENCY}）")
+    args = parser.parse_args()
+    
+    engine = AsyncScrapeEngine(concurrency=args.concurrency)
+    output_file = asyncio.run(engine.run(args.items_csv, resume=args.resume))
+    
+    if output_file:
+        print(f"\n爬取完成! 结果保存在: {output_file}")
+    else:
+        print("\n爬取失败，请查看日志文件获取详细信息")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+离线性能基准
+在本地HTTP服务器上提供售价/租价页面（可配置响应延迟和页面大小），关闭延迟后端到端驱动YoupinScraper，
+统计页面吞吐量、解析耗时分位数和每1000个商品的内存占用，不访问悠悠有品网站
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import config
+from scraper import YoupinScraper
+
+
+logger = logging.getLogger(__name__)
+
+
+# 售价/租价页面的磨损度按钮（与线上页面结构一致，含一个应被过滤的StatTrak按钮）
+SELL_BUTTON = '<div class="btn-box___eKv2g">{wear}<span class="price-unit___xhhFc">¥</span>{price:.2f}</div>'
+RENT_BUTTON = '<div class="btn-box___eKv2g">{wear}<span class="price-unit___xhhFc">¥</span>{price:.2f}/天</div>'
+STATTRAK_BUTTON = '<div class="btn-box___eKv2g">★ StatTrak™<span class="price-unit___xhhFc">¥</span>999.00</div>'
+
+# 填充页面大小用的商品卡片（每张卡片引用一张图片）
+FILLER_CARD = '<div class="goods-card___a1b2c"><img src="/img/{n}.png"><span>在售商品 {n}</span></div>\n'
+
+# 页面引用的字体和统计脚本（用于验证请求屏蔽）
+PAGE_HEAD = (
+    '<style>@font-face{font-family:yp;src:url(/static/yp.woff2)} body{font-family:yp}</style>'
+    '<script src="/analytics.js"></script>'
+)
+
+# 出售/出租页签和前端路由：点击页签或popstate时只请求磨损度按钮片段(&fragment=1)并替换，不整页加载
+LIST_TABS = (
+    '<div class="tabs___t1"><span class="tab-item___k1" data-list-type="10">出售</span>'
+    '<span class="tab-item___k1" data-list-type="30">出租</span></div>'
+)
+ROUTER_SCRIPT = '''<script>
+function showList(url) {
+    fetch(url + '&fragment=1').then(function (r) { return r.text(); }).then(function (html) {
+        document.querySelector('.exterior___x1').innerHTML = html;
+    });
+}
+document.addEventListener('click', function (e) {
+    var tab = e.target.closest('[data-list-type]');
+    if (!tab) { return; }
+    var params = new URLSearchParams(location.search);
+    params.set('listType', tab.dataset.listType);
+    var url = location.pathname + '?' + params;
+    history.pushState(null, '', url);
+    showList(url);
+});
+window.addEventListener('popstate', function () { showList(location.pathname + location.search); });
+</script>'''
+
+# 图片、字体、脚本等资源的响应大小（字节）
+ASSET_SIZE = 8 * 1024
+
+
+def render_buttons(list_type: int, template_id: str) -> str:
+    """生成磨损度按钮（template_id用于生成不同的价格）"""
+    base = (int(template_id) if template_id.isdigit() else 1) % 1000 + 1
+    template = SELL_BUTTON if list_type == config.LIST_TYPE_SELL else RENT_BUTTON
+    scale = 1.0 if list_type == config.LIST_TYPE_SELL else 0.001
+    buttons = [STATTRAK_BUTTON] + [
+        template.format(wear=wear, price=base * (5 - i) * scale * 10)
+        for i, wear in enumerate(config.WEAR_LEVELS.keys())
+    ]
+    return ''.join(buttons)
+
+
+def render_page(list_type: int, template_id: str, payload_kb: int = 0) -> bytes:
+    """
+    生成一个商品列表页面
+    
+    Args:
+        list_type: 页面类型（10=售价，30=租价）
+        template_id: 商品模板ID（用于生成不同的价格）
+        payload_kb: 额外填充的页面大小（KB），模拟真实页面体积
+    
+    Returns:
+        UTF-8编码的HTML
+    """
+    filler = []
+    size = 0
+    n = 0
+    while size < payload_kb * 1024:
+        card = FILLER_CARD.format(n=n)
+        filler.append(card)
+        size += len(card.encode('utf-8'))
+        n += 1
+    
+    html = (
+        f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>goods-list</title>{PAGE_HEAD}</head><body>'
+        f'{LIST_TABS}<div class="exterior___x1">{render_buttons(list_type, template_id)}</div>'
+        f'<div class="list___y2">{"".join(filler)}</div>'
+        f'{ROUTER_SCRIPT}</body></html>'
+    )
+    return html.encode('utf-8')
+
+
+class FixtureServer:
+    """
+    本地页面服务器
+    
+    /market/goods-list?listType=..&templateId=.. 返回售价或租价页面，加&fragment=1时只返回磨损度按钮（页内切换），
+    其他路径（图片、字体、脚本）返回ASSET_SIZE字节的资源，分别统计页面、片段和资源的请求数、字节数。
+    指定fixture_dir时优先使用其中录制的sell.html、rent.html（浏览器“另存为”得到的页面）。
+    """
+    
+    def __init__(self, latency: float = 0.0, payload_kb: int = 0, fixture_dir: str = None, port: int = 0):
+        """
+        创建服务器（调用start()后开始监听）
+        
+        Args:
+            latency: 每个响应的额外延迟（秒）
+            payload_kb: 生成页面的填充大小（KB）
+            fixture_dir: 录制页面所在目录
+            port: 监听端口，0表示自动分配
+        """
+        self.latency = latency
+        self.payload_kb = payload_kb
+        self.recorded: Dict[int, bytes] = {}
+        if fixture_dir:
+            for list_type, filename in ((config.LIST_TYPE_SELL, 'sell.html'), (config.LIST_TYPE_RENT, 'rent.html')):
+                path = os.path.join(fixture_dir, filename)
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        self.recorded[list_type] = f.read()
+        
+        self.requests = 0
+        self.bytes_sent = 0
+        self.fragment_requests = 0
+        self.asset_requests = 0
+        self.asset_bytes = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def base_url(self) -> str:
+        """商品列表页面地址（替换config.BASE_URL使用）"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/market/goods-list"
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != '/market/goods-list':
+                    self._send_asset(url.path)
+                    return
+                
+                query = parse_qs(url.query)
+                list_type = int(query.get('listType', [config.LIST_TYPE_SELL])[0])
+                template_id = query.get('templateId', [''])[0]
+                fragment = 'fragment' in query
+                if fragment:
+                    body = render_buttons(list_type, template_id).encode('utf-8')
+                else:
+                    body = server.recorded.get(list_type) or render_page(list_type, template_id, server.payload_kb)
+                
+                if server.latency > 0:
+                    time.sleep(server.latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                
+                with server._lock:
+                    if fragment:
+                        server.fragment_requests += 1
+                    else:
+                        server.requests += 1
+                    server.bytes_sent += len(body)
+            
+            def _send_asset(self, path):
+                content_type = 'application/javascript' if path.endswith('.js') else 'application/octet-stream'
+                body = b'\0' * ASSET_SIZE if not path.endswith('.js') else b'/*' + b' ' * ASSET_SIZE + b'*/'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                
+                with server._lock:
+                    server.asset_requests += 1
+                    server.asset_bytes += len(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def start(self) -> str:
+        """在后台线程启动服务器，返回base_url"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+    
+    def stop(self):
+        """停止服务器"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算分位数（最近秩法），空列表返回0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def write_items_csv(filepath: str, count: int):
+    """生成count个商品的输入文件（每个商品有普通版和暗金版两个不同的templateId）"""
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for i in range(count):
+            writer.writerow([f"基准商品 {i}", str(100000 + i * 2), str(100001 + i * 2)])
+
+
+def run_benchmark(item_count: int = 200, latency: float = 0.0, payload_kb: int = 0,
+                  tab_count: int = 1, fixture_dir: str = None, block: bool = True,
+                  spa: bool = False) -> Dict[str, float]:
+    """
+    端到端运行一次基准
+    
+    关闭随机延迟、自适应限速、页面缓存和价格历史库，结果写入临时目录，运行结束后恢复config。
+    
+    Args:
+        item_count: 商品数量
+        latency: 服务器响应延迟（秒）
+        payload_kb: 页面填充大小（KB）
+        tab_count: 并发标签页数量
+        fixture_dir: 录制页面所在目录
+        block: 是否启用请求屏蔽（BLOCK_RESOURCES）
+        spa: 租价列表是否在售价页面内切换（SPA_TAB_SWITCH）
+    
+    Returns:
+        统计结果字典
+    """
+    workdir = tempfile.mkdtemp(prefix='youpin_bench_')
+    server = FixtureServer(latency, payload_kb, fixture_dir)
+    overrides = {
+        'BASE_URL': server.start(),
+        'MIN_DELAY': 0,
+        'MAX_DELAY': 0,
+        'ADAPTIVE_RATE': False,
+        'USE_PAGE_CACHE': False,
+        'SAVE_HISTORY': False,
+        'USE_SESSION_BACKEND': False,
+        'BLOCK_RESOURCES': block,
+        'SPA_TAB_SWITCH': spa,
+        'TAB_COUNT': tab_count,
+        'OUTPUT_DIR': workdir,
+        'CHECKPOINT_FILE': os.path.join(workdir, 'progress.jsonl'),
+        # 不覆盖真实运行的快照（否则下一次正式运行会把所有行记为新增）
+        'DELTA_OUTPUT': False,
+        # 失败页面的退避等待会计入耗时
+        'RETRY_FAILED': False,
+        # 不从会话服务租用已预热的真实标签页
+        'USE_SESSION_SERVICE': False,
+        'SNAPSHOT_FILE': os.path.join(workdir, 'snapshot.tsv'),
+    }
+    saved = {name: getattr(config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    
+    items_csv = os.path.join(workdir, 'items.csv')
+    write_items_csv(items_csv, item_count)
+    
+    try:
+        scraper = YoupinScraper()
+        
+        # 记录每次页面解析耗时
+        parse_times = []
+        parse = scraper._parse_prices_from_page
+        
+        def timed_parse(tab=None):
+            start = time.perf_counter()
+            try:
+                return parse(tab)
+            finally:
+                parse_times.append(time.perf_counter() - start)
+        
+        scraper._parse_prices_from_page = timed_parse
+        
+        tracemalloc.start()
+        start = time.perf_counter()
+        output_file = scraper.run(items_csv)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        records = 0
+        if output_file:
+            with open(output_file, 'r', encoding='utf-8-sig') as f:
+                records = sum(1 for _ in f) - 1
+    finally:
+        server.stop()
+        for name, value in saved.items():
+            setattr(config, name, value)
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    return {
+        'items': item_count,
+        'tabs': tab_count,
+        'latency_ms': latency * 1000,
+        'payload_kb': payload_kb,
+        'pages': server.requests,
+        'spa_switches': server.fragment_requests,
+        'records': records,
+        'elapsed_s': elapsed,
+        # 页内切换得到的租价列表也计入吞吐量
+        'pages_per_sec': (server.requests + server.fragment_requests) / elapsed if elapsed > 0 else 0.0,
+        'parse_p50_ms': percentile(parse_times, 50) * 1000,
+        'parse_p90_ms': percentile(parse_times, 90) * 1000,
+        'parse_p99_ms': percentile(parse_times, 99) * 1000,
+        'peak_mem_mb_per_1000_items': peak / 1024 / 1024 / item_count * 1000 if item_count else 0.0,
+        'bytes_per_page': server.bytes_sent / (server.requests + server.fragment_requests) if server.requests else 0.0,
+        'block_resources': block,
+        'asset_requests': server.asset_requests,
+        'asset_mb': server.asset_bytes / 1024 / 1024,
+    }
+
+
+def run_parse_benchmark(iterations: int = 20000) -> Dict[str, float]:
+    """
+    只测试按钮文本解析（_prices_from_button_texts），不需要浏览器
+    
+    Args:
+        iterations: 解析次数（售价、租价页面各一半）
+    
+    Returns:
+        统计结果字典
+    """
+    scraper = YoupinScraper()
+    # 与页面上按钮的innerText相同
+    samples = [
+        [f"{wear}¥{2329 - i * 100:.2f}" for i, wear in enumerate(config.WEAR_LEVELS.keys())],
+        [f"{wear}¥{0.6 + i * 0.1:.2f}/天" for i, wear in enumerate(config.WEAR_LEVELS.keys())],
+    ]
+    
+    times = []
+    for i in range(iterations):
+        texts = samples[i % 2]
+        start = time.perf_counter()
+        scraper._prices_from_button_texts(texts)
+        times.append(time.perf_counter() - start)
+    
+    return {
+        'iterations': iterations,
+        'parse_p50_us': percentile(times, 50) * 1e6,
+        'parse_p90_us': percentile(times, 90) * 1e6,
+        'parse_p99_us': percentile(times, 99) * 1e6,
+        'parses_per_sec': iterations / sum(times) if times else 0.0,
+    }
+
+
+def print_report(result: Dict[str, float]):
+    """输出统计结果"""
+    print("=" * 60)
+    for key, value in result.items():
+        print(f"  {key:<28} {value:>12.3f}" if isinstance(value, float) else f"  {key:<28} {str(value):>12}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CS2饰品价格爬虫 - 离线性能基准")
+    parser.add_argument("--items", type=int, default=200, help="商品数量")
+    parser.add_argument("--latency", type=float, default=0, help="服务器响应延迟（毫秒）")
+    parser.add_argument("--payload-kb", type=int, default=0, help="页面填充大小（KB）")
+    parser.add_argument("--tabs", type=int, default=1, help="并发标签页数量")
+    parser.add_argument("--fixtures", default=None, help="录制页面目录（包含sell.html、rent.html）")
+    parser.add_argument("--no-block", action="store_true", help="不屏蔽图片、字体、媒体和统计脚本（对比请求屏蔽效果）")
+    parser.add_argument("--spa", action="store_true", help="租价列表在售价页面内切换（对比整页加载次数）")
+    parser.add_argument("--parse-only", action="store_true", help="只测试价格解析，不启动浏览器")
+    parser.add_argument("--json", default=None, help="将结果写入JSON文件")
+    args = parser.parse_args()
+    
+    # 逐页的INFO日志会影响计时
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    if args.parse_only:
+        result = run_parse_benchmark()
+    else:
+        result = run_benchmark(args.items, args.latency / 1000, args.payload_kb, args.tabs, args.fixtures,
+                               block=not args.no_block, spa=args.spa)
+    print_report(result)
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,114 @@
+"""
+断点续爬模块
+以追加写入的JSONL文件记录已采集的页面，程序中断后可用 --resume 跳过已完成的页面
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressJournal:
+    """
+    采集进度日志
+    
+    每采集完一个页面追加一行：
+    {"template_id": "57387", "list_type": 10, "prices": {"崭新出厂": 2329.0, ...}}
+    页面暂无商品或重试次数用完时同样记录（价格均为null），续爬时视为已完成。
+    每行写入后立即fsync，进程崩溃最多丢失正在写的一行；读取时跳过不完整的行。
+    """
+    
+    def __init__(self, filepath: str = None):
+        """
+        初始化进度日志
+        
+        Args:
+            filepath: 日志文件路径，默认使用config.CHECKPOINT_FILE
+        """
+        if filepath is None:
+            filepath = config.CHECKPOINT_FILE
+        
+        self.filepath = filepath
+        self.entries: Dict[Tuple[str, int], Dict[str, Optional[float]]] = {}
+        self._file = None
+        self._lock = threading.Lock()
+    
+    def load(self) -> int:
+        """
+        读取已有的进度日志
+        
+        Returns:
+            已完成的页面数量
+        """
+        self.entries = {}
+        if not os.path.exists(self.filepath):
+            return 0
+        
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    key = (str(entry['template_id']), int(entry['list_type']))
+                    self.entries[key] = entry['prices']
+                except (ValueError, KeyError, TypeError) as e:
+                    # 崩溃时最后一行可能不完整
+                    logger.warning(f"跳过进度日志第 {line_no} 行: {e}")
+        
+        return len(self.entries)
+    
+    def reset(self):
+        """清空进度日志，开始新的采集"""
+        self.close()
+        self.entries = {}
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+    
+    def get(self, template_id: str, list_type: int) -> Optional[Dict[str, Optional[float]]]:
+        """返回已记录页面的价格，未记录返回None"""
+        return self.entries.get((template_id, list_type))
+    
+    def record(self, template_id: str, list_type: int, prices: Dict[str, Optional[float]]):
+        """
+        记录一个已完成的页面
+        
+        Args:
+            template_id: 商品模板ID
+            list_type: 页面类型（10=售价，30=租价）
+            prices: {磨损度: 价格} 字典
+        """
+        line = json.dumps({'template_id': template_id, 'list_type': list_type, 'prices': prices},
+                          ensure_ascii=False)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.filepath) or '.', exist_ok=True)
+                self._file = open(self.filepath, 'a', encoding='utf-8')
+                # 上次崩溃留下的不完整行单独成行，不与新记录拼接
+                if self._file.tell() > 0 and not self._ends_with_newline():
+                    self._file.write('\n')
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.entries[(template_id, list_type)] = prices
+    
+    def _ends_with_newline(self) -> bool:
+        """日志文件是否以换行结尾"""
+        with open(self.filepath, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+    
+    def close(self):
+        """关闭日志文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
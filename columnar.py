@@ -0,0 +1,246 @@
+"""
+列式输出模块
+与CSV结果文件同时写出带类型的Parquet（或Arrow IPC流）文件：价格和租售比为float列，商品名、版本、磨损度为字典编码，
+附带本次运行的采集时间列。记录攒够COLUMNAR_ROW_GROUP_SIZE行写一个row group，数仓加载和历史扫描不必再解析CSV
+"""
+
+import argparse
+import csv
+import glob
+import logging
+import os
+import re
+import sys
+from datetime import datetime
+from typing import List
+
+import config
+from data_processor import RecordBatch, add_rent_ratio, parse_price
+
+
+logger = logging.getLogger(__name__)
+
+
+# 格式 -> 文件扩展名（Arrow IPC文件格式不支持各批次使用不同的字典，使用流格式）
+COLUMNAR_SUFFIXES = {'parquet': '.parquet', 'arrow': '.arrows'}
+
+# 列顺序
+COLUMNAR_COLUMNS = ['item_name', 'version', 'wear_level', 'sell_price', 'rent_price', 'rent_ratio', 'scraped_at']
+
+
+def read_columnar(filepath: str):
+    """
+    读取列式结果文件
+    
+    Args:
+        filepath: .parquet或.arrows文件路径
+    
+    Returns:
+        DataFrame，列为COLUMNAR_COLUMNS（字典编码列读取为分类列）
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    if filepath.endswith(COLUMNAR_SUFFIXES['arrow']):
+        with pa.OSFile(filepath, 'rb') as f:
+            table = pa.ipc.open_stream(f).read_all()
+    else:
+        table = pq.read_table(filepath)
+    return table.to_pandas()
+
+
+class ColumnarWriter:
+    """
+    列式结果写入器
+    
+    与ResultWriter相同的写入接口，写入的记录先缓存在RecordBatch中，攒够row_group_size行时
+    经pandas转换为Arrow表写出一个row group（Parquet）或一个批次（Arrow IPC流）。
+    需要pyarrow，未安装时构造函数抛出ImportError。
+    """
+    
+    def __init__(self, csv_file: str, scraped_at: datetime = None, fmt: str = None, row_group_size: int = None):
+        """
+        创建输出文件
+        
+        Args:
+            csv_file: 对应的CSV结果文件路径（列式文件与其同名，扩展名不同）
+            scraped_at: 采集时间，默认为当前时间
+            fmt: 'parquet'或'arrow'，默认使用config.COLUMNAR_FORMAT
+            row_group_size: 每个row group的行数，默认使用config.COLUMNAR_ROW_GROUP_SIZE
+        """
+        import pyarrow as pa
+        
+        self.format = (fmt or config.COLUMNAR_FORMAT).lower()
+        if self.format not in COLUMNAR_SUFFIXES:
+            raise ValueError(f"不支持的列式格式: {self.format}（可选 {', '.join(COLUMNAR_SUFFIXES)}）")
+        self.output_file = os.path.splitext(csv_file)[0] + COLUMNAR_SUFFIXES[self.format]
+        self.scraped_at = scraped_at or datetime.now()
+        self.row_group_size = config.COLUMNAR_ROW_GROUP_SIZE if row_group_size is None else row_group_size
+        self.count = 0
+        self.schema = pa.schema([
+            ('item_name', pa.dictionary(pa.int32(), pa.string())),
+            ('version', pa.dictionary(pa.int8(), pa.string())),
+            ('wear_level', pa.dictionary(pa.int8(), pa.string())),
+            ('sell_price', pa.float64()),
+            ('rent_price', pa.float64()),
+            ('rent_ratio', pa.float64()),
+            ('scraped_at', pa.timestamp('ms')),
+        ])
+        
+        os.makedirs(os.path.dirname(self.output_file) or '.', exist_ok=True)
+        self._buffer = RecordBatch()
+        self._writer = self._open(self.output_file)
+    
+    def _open(self, filepath: str):
+        """打开底层写入器"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        if self.format == 'arrow':
+            return pa.ipc.new_stream(filepath, self.schema)
+        return pq.ParquetWriter(filepath, self.schema, compression='zstd')
+    
+    def write(self, records):
+        """
+        追加写入记录
+        
+        Args:
+            records: PriceRecord列表或RecordBatch
+        """
+        rows = records.rows() if isinstance(records, RecordBatch) else (
+            (r.item_name, r.version, r.wear_level, r.sell_price, r.rent_price) for r in records)
+        for row in rows:
+            self._buffer.append(*row)
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+    
+    def flush(self):
+        """把缓存的记录写成一个row group"""
+        if not len(self._buffer):
+            return
+        self._writer.write_table(self._to_table(self._buffer.to_frame()))
+        self.count += len(self._buffer)
+        self._buffer = RecordBatch()
+    
+    def _to_table(self, df):
+        """DataFrame（RecordBatch.to_frame的列）-> 符合schema的Arrow表"""
+        import pandas as pd
+        import pyarrow as pa
+        
+        df = add_rent_ratio(df)
+        df['scraped_at'] = pd.Timestamp(self.scraped_at).floor('ms')
+        return pa.Table.from_pandas(df[COLUMNAR_COLUMNS], schema=self.schema, preserve_index=False)
+    
+    def close(self):
+        """写出剩余记录并关闭文件"""
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+    
+    def patch(self, records: RecordBatch) -> int:
+        """
+        用新的价格替换已写入的行（重试成功后调用，需先close），按(商品名, 版本, 磨损度)匹配，
+        写入临时文件后替换
+        
+        Args:
+            records: 修补后的记录
+        
+        Returns:
+            替换的行数
+        """
+        if not len(records) or not os.path.exists(self.output_file):
+            return 0
+        
+        fixes = {(name, version, wear): (sell, rent) for name, version, wear, sell, rent in records.rows()}
+        df = read_columnar(self.output_file)
+        keys = zip(df['item_name'].astype(str), df['version'].astype(str), df['wear_level'].astype(str))
+        positions = []
+        sell_prices = []
+        rent_prices = []
+        for i, key in enumerate(keys):
+            fix = fixes.get(key)
+            if fix is not None:
+                positions.append(i)
+                sell_prices.append(fix[0])
+                rent_prices.append(fix[1])
+        if not positions:
+            return 0
+        
+        df.loc[positions, 'sell_price'] = [float('nan') if v is None else v for v in sell_prices]
+        df.loc[positions, 'rent_price'] = [float('nan') if v is None else v for v in rent_prices]
+        table = self._to_table(df)
+        
+        tmp_path = self.output_file + '.tmp'
+        writer = self._open(tmp_path)
+        for start in range(0, table.num_rows, max(self.row_group_size, 1)):
+            writer.write_table(table.slice(start, self.row_group_size))
+        writer.close()
+        os.replace(tmp_path, self.output_file)
+        
+        logger.info(f"已用重试结果修补列式文件 {len(positions)} 行: {self.output_file}")
+        return len(positions)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def convert_results_csv(filepath: str, fmt: str = None) -> str:
+    """
+    将已有的结果CSV转换为列式文件，采集时间取自文件名（result_YYYYMMDD_HHMMSS.csv）
+    
+    Args:
+        filepath: 结果CSV文件路径
+        fmt: 'parquet'或'arrow'，默认使用config.COLUMNAR_FORMAT
+    
+    Returns:
+        列式文件路径
+    """
+    match = re.search(r'(\d{8}_\d{6})', os.path.basename(filepath))
+    if match:
+        scraped_at = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+    else:
+        scraped_at = datetime.fromtimestamp(os.path.getmtime(filepath))
+    
+    with ColumnarWriter(filepath, scraped_at, fmt) as writer, \
+            open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        batch = RecordBatch()
+        for row in reader:
+            batch.append(row[0], row[1], row[2], parse_price(row[3]), parse_price(row[4]))
+            if len(batch) >= writer.row_group_size:
+                writer.write(batch)
+                batch = RecordBatch()
+        writer.write(batch)
+    return writer.output_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CS2饰品价格爬虫 - 将结果CSV转换为Parquet/Arrow")
+    parser.add_argument("paths", nargs="*", help="结果CSV文件或通配符（默认转换config.OUTPUT_DIR下所有result_*.csv）")
+    parser.add_argument("--format", choices=sorted(COLUMNAR_SUFFIXES), default=None,
+                        help="输出格式（默认使用config.COLUMNAR_FORMAT）")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=getattr(logging, config.LOG_LEVEL),
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(config.LOG_FILE, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    paths: List[str] = []
+    for pattern in args.paths or [os.path.join(config.OUTPUT_DIR, 'result_*.csv')]:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            print(f"没有找到结果文件: {pattern}（请先运行爬虫，或指定结果文件路径）")
+            sys.exit(1)
+        paths.extend(matches)
+    for path in paths:
+        logger.info(f"已转换: {path} -> {convert_results_csv(path, args.format)}")
@@ -30,9 +30,111 @@ MIN_DELAY = 1  # 最小延迟（秒）
 MAX_DELAY = 3  # 最大延迟（秒）
 PAGE_LOAD_TIMEOUT = 10  # 页面加载超时（秒）
 
+# 就绪检测（轮询代替固定等待）
+READY_POLL_INTERVAL = 0.05  # 轮询间隔（秒）
+CHROME_START_TIMEOUT = 15  # 启动Chrome后等待调试端口(/json/version)就绪的最长时间（秒）
+CHROME_RETRY_TIMEOUT = 2  # 连接失败重试前等待调试端口就绪的最长时间（秒）
+CONTENT_TIMEOUT = 5  # 等待磨损度按钮出现的最长时间（秒）
+NETWORK_IDLE_MS = 500  # 页面加载完成后多久没有新的网络请求视为网络空闲（毫秒）
+EMPTY_PAGE_TEXTS = ('暂无数据', '暂无商品', '暂无在售', '暂无出租')  # 页面没有在售/出租商品时的提示文字
+
+# 页内切换：售价页面加载完成后点击页面上的出租页签（找不到时通过前端路由）切换到租价列表，不再整页加载
+SPA_TAB_SWITCH = False  # 是否启用页内切换（切换失败时自动回退到整页加载）
+SPA_RENT_TAB_TEXTS = ('出租', '租赁')  # 出租页签的文字
+SPA_SWITCH_TIMEOUT = 3  # 切换后等待磨损度按钮更新的最长时间（秒）
+SPA_MAX_FAILURES = 3  # 连续切换失败多少次后本次运行不再尝试页内切换
+
+# 请求屏蔽（只读取按钮文字，不需要加载图片、字体、媒体和统计脚本）
+BLOCK_RESOURCES = True  # 是否屏蔽以下请求（关闭时仍统计请求数和流量）
+BLOCKED_URL_PATTERNS = (
+    '*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.svg*', '*.ico*',  # 图片
+    '*.woff*', '*.ttf*', '*.otf*', '*.eot*',  # 字体
+    '*.mp4*', '*.webm*', '*.mp3*', '*.m3u8*',  # 媒体
+    '*google-analytics.com*', '*googletagmanager.com*', '*hm.baidu.com*', '*cnzz.com*',
+    '*growingio.com*', '*sensorsdata*', '*/analytics.js*',  # 统计脚本
+)  # 屏蔽的URL模式（*为通配符）
+
+# 自适应限速（令牌桶 + 加性增/乘性减，替代MIN_DELAY~MAX_DELAY固定随机延迟）
+# 以下速率均为每个标签页的速率：多个标签页或异步引擎共享一个令牌桶，总速率和容量按标签页数放大
+ADAPTIVE_RATE = True  # 是否启用自适应限速
+RATE_INITIAL = 0.5  # 初始速率（页/秒）
+RATE_MIN = 0.1  # 最低速率（页/秒）
+RATE_MAX = 2.0  # 最高速率（页/秒）
+RATE_INCREASE = 0.05  # 页面正常时速率增加量
+RATE_DECREASE = 0.5  # 页面异常时速率乘数
+RATE_BURST = 1  # 令牌桶容量（允许的突发页面数）
+RATE_JITTER = 0.3  # 等待时间随机抖动比例
+RATE_LOG_INTERVAL = 20  # 每采集多少页记录一次当前速率
+RATE_HISTORY_SIZE = 200  # 保留的速率变化历史条数
+
+# 并发配置
+TAB_COUNT = 1  # 并发标签页数量（1=单标签页顺序采集，>1时每个标签页独立控制节奏）
+SKIP_RENT_WITHOUT_SELL = True  # 售价页面没有任何磨损度时不再访问租价页面
+PIPELINE_QUEUE_SIZE = 100  # 读取/采集/写入各阶段之间队列的容量（限制内存占用）
+PAGE_RESULTS_MAX = 10000  # 本次运行内存中保留的页面结果数量（用于同一templateId去重）
+ASYNC_CONCURRENCY = 4  # 异步引擎（python async_engine.py）的并发数：标签页/页面访问协程数和解析协程数
+
+# 失败页面延迟重试：超时、出错或未解析到价格的页面先跳过，主流程结束后按指数退避重试并修补结果文件
+RETRY_FAILED = True  # 是否重试失败的页面
+RETRY_REASONS = ('timeout', 'error', 'empty')  # 需要重试的失败原因（页面显示暂无商品不重试）
+RETRY_MAX_ATTEMPTS = 3  # 每个页面最多重试次数
+RETRY_BASE_DELAY = 5  # 第一次重试前的等待时间（秒），之后每次翻倍
+RETRY_MAX_DELAY = 60  # 重试前最长等待时间（秒）
+
+# 多浏览器分片（python sharding.py）：第i个分片使用端口CHROME_DEBUG_PORT+i和用户数据目录CHROME_USER_DATA_DIR_i
+SHARD_COUNT = 2  # 浏览器/工作进程数量
+SHARD_DIR = "output/shards"  # 分片的商品列表、进度日志和中间结果目录
+
+# 网络响应捕获模式（直接读取页面XHR返回的JSON，不等待渲染）
+USE_NETWORK_CAPTURE = False  # 是否启用网络响应捕获
+CAPTURE_TARGET = "/api/"  # 需要捕获的接口URL特征
+CAPTURE_TIMEOUT = 5  # 等待接口响应的超时（秒），超时后回退到DOM解析
+CAPTURE_WEAR_KEYS = ('exteriorName', 'exterior', 'wearName', 'abradeName')  # JSON中磨损度字段名
+CAPTURE_SELL_PRICE_KEYS = ('minPrice', 'sellPrice', 'price')  # 售价页面JSON中的价格字段名
+CAPTURE_RENT_PRICE_KEYS = ('minLeaseUnitPrice', 'leaseUnitPrice')  # 租价页面JSON中的价格字段名（不使用售价字段）
+
+# 轻量HTTP采集后端（不经过浏览器，失败时自动回退到浏览器）
+USE_SESSION_BACKEND = False  # 是否优先使用HTTP后端
+SESSION_API_URL = ""  # 可选：返回JSON的接口URL模板，支持{template_id}、{list_type}、{game_id}；为空时请求页面HTML
+SESSION_POOL_SIZE = 10  # HTTP连接池大小（保持长连接复用）
+
+# 常驻会话服务（python session_service.py）：保持预热的Chrome和标签页，采集时直接租用
+USE_SESSION_SERVICE = True  # 采集时优先从会话服务租用标签页（服务未运行时照常连接浏览器）
+SESSION_SERVICE_PORT = 9333  # 会话服务监听端口（仅本机）
+SESSION_SERVICE_TABS = 4  # 会话服务预先打开的标签页数量
+SESSION_SERVICE_TIMEOUT = 0.5  # 连接会话服务的超时（秒）
+
 # 文件路径
 INPUT_CSV = "items.csv"  # 输入文件
 OUTPUT_DIR = "output"  # 输出目录
+FSYNC_INTERVAL = 5  # 结果文件落盘(fsync)间隔（秒）
+SAVE_HISTORY = True  # 是否同时写入价格历史库
+HISTORY_DB = "output/history.db"  # 价格历史库（SQLite）
+DELTA_OUTPUT = True  # 是否同时输出与上一次运行相比的增量文件（delta_*.csv，只含新增/变化/消失的行）
+SNAPSHOT_FILE = "output/snapshot.tsv"  # 上一次运行结果的快照（增量比较用）
+COLUMNAR_OUTPUT = False  # 是否同时输出列式文件（需要pip install pyarrow），价格为float列，名称为字典编码
+COLUMNAR_FORMAT = 'parquet'  # 'parquet'（result_*.parquet）或 'arrow'（Arrow IPC流，result_*.arrows）
+COLUMNAR_ROW_GROUP_SIZE = 50000  # 每攒够多少行写出一个row group
+
+# 页面结果缓存（多个商品列表重叠时，有效期内的页面不再重复访问）
+USE_PAGE_CACHE = True  # 是否启用页面结果缓存
+PAGE_CACHE_FILE = "output/page_cache.db"  # 缓存文件
+PAGE_CACHE_TTL = 600  # 缓存有效期（秒）
+PAGE_CACHE_MAX_ENTRIES = 10000  # 缓存最大条目数，超过时淘汰最久未访问的条目
+
+# 运行指标（每次运行结束时在结果文件旁写入 result_*_metrics.json）
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # 耗时直方图桶边界（秒）
+METRICS_PROM_FILE = "output/youpin_scraper.prom"  # 持续监控模式下的Prometheus textfile
+METRICS_PROM_INTERVAL = 60  # Prometheus textfile更新间隔（秒）
+
+# 持续监控模式（python daemon.py）
+DAEMON_BASE_INTERVAL = 3600  # 波动率等于参考值时的复查间隔（秒）
+DAEMON_VOLATILITY_REF = 0.02  # 参考波动率（相邻两次采集平均相对变化2%）
+DAEMON_MIN_INTERVAL = 600  # 最短复查间隔（秒）
+DAEMON_MAX_INTERVAL = 86400  # 最长复查间隔（秒）
+DAEMON_VOLATILITY_DAYS = 7  # 计算波动率使用的历史天数
+DAEMON_IDLE_SLEEP = 5  # 没有到期商品时的轮询间隔（秒）
+CHECKPOINT_FILE = "output/progress.jsonl"  # 断点续爬进度日志（--resume时读取）
 
 # 日志配置
 LOG_FILE = "scraper.log"
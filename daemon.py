@@ -0,0 +1,151 @@
+"""
+持续监控模块
+保持浏览器连接，按价格波动率安排各商品的复查间隔：波动大的商品更频繁地采集，稳定的商品少采集
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import config
+from data_processor import Item, ResultWriter, read_items_csv
+from history_store import PriceHistoryStore
+from planner import build_plan
+from request_blocker import RequestBlocker
+from scraper import YoupinScraper
+
+
+logger = logging.getLogger(__name__)
+
+
+class MonitorDaemon:
+    """
+    持续监控守护进程
+    
+    所有商品放在按“下次采集时间”排序的优先队列中，每次取出最早到期的商品采集，
+    采集后根据价格历史库中的波动率计算下次采集间隔：
+        间隔 = DAEMON_BASE_INTERVAL * DAEMON_VOLATILITY_REF / 波动率
+    并限制在 [DAEMON_MIN_INTERVAL, DAEMON_MAX_INTERVAL] 之间。
+    """
+    
+    def __init__(self, scraper: YoupinScraper = None):
+        """
+        初始化守护进程
+        
+        Args:
+            scraper: 使用的爬虫对象，默认新建一个
+        """
+        self.scraper = scraper or YoupinScraper()
+        self.queue: List[Tuple[float, int, Item]] = []
+        self._seq = itertools.count()
+        self._running = False
+    
+    def schedule(self, item: Item, delay: float = 0):
+        """将商品放入队列，delay秒后到期"""
+        heapq.heappush(self.queue, (time.time() + delay, next(self._seq), item))
+    
+    def next_interval(self, item: Item) -> float:
+        """
+        根据波动率计算商品的下次采集间隔
+        
+        Returns:
+            间隔秒数
+        """
+        volatility = self.scraper.history.volatility(item.name, config.DAEMON_VOLATILITY_DAYS)
+        if volatility is None:
+            # 没有历史数据，按基准间隔
+            return config.DAEMON_BASE_INTERVAL
+        
+        interval = config.DAEMON_BASE_INTERVAL * config.DAEMON_VOLATILITY_REF / max(volatility, 1e-6)
+        return min(max(interval, config.DAEMON_MIN_INTERVAL), config.DAEMON_MAX_INTERVAL)
+    
+    def run(self, items_csv: str = None):
+        """
+        运行守护进程，直到Ctrl+C或调用stop()
+        
+        Args:
+            items_csv: 输入CSV文件路径
+        """
+        items = build_plan(read_items_csv(items_csv)).items
+        logger.info(f"监控 {len(items)} 个商品")
+        if not items:
+            logger.error("没有找到商品数据")
+            return
+        
+        leased = config.USE_SESSION_SERVICE and self.scraper.lease_from_service(1)
+        if not leased and not self.scraper.connect():
+            logger.error("无法连接到浏览器")
+            return
+        
+        # 守护进程自己安排复查时间，不使用页面缓存和进度日志
+        self.scraper.cache = None
+        self.scraper.journal = None
+        self.scraper.history = PriceHistoryStore()
+        self.scraper.writer = ResultWriter()
+        self.scraper.blocker = RequestBlocker()
+        self.scraper.blocker.attach(self.scraper.page)
+        logger.info(f"结果输出文件: {self.scraper.writer.output_file}")
+        
+        # 启动时全部立即到期，波动大的商品排在前面
+        volatilities = {item.name: self.scraper.history.volatility(item.name, config.DAEMON_VOLATILITY_DAYS)
+                        for item in items}
+        for item in sorted(items, key=lambda x: -(volatilities[x.name] or 0)):
+            self.schedule(item)
+        
+        self._running = True
+        self.scraper.metrics.reset()
+        last_export = 0.0
+        try:
+            while self._running:
+                due, _, item = self.queue[0]
+                wait = due - time.time()
+                if wait > 0:
+                    time.sleep(min(wait, config.DAEMON_IDLE_SLEEP))
+                    continue
+                
+                heapq.heappop(self.queue)
+                try:
+                    self.scraper._write_records(self.scraper.scrape_item(item))
+                except Exception as e:
+                    logger.error(f"处理商品 {item.name} 时出错: {e}")
+                
+                interval = self.next_interval(item)
+                self.schedule(item, interval)
+                logger.info(f"{item.name} 下次采集: {interval / 60:.1f} 分钟后")
+                
+                # 定期更新Prometheus textfile
+                if time.time() - last_export >= config.METRICS_PROM_INTERVAL:
+                    self._export_metrics()
+                    last_export = time.time()
+        except KeyboardInterrupt:
+            logger.info("收到中断信号，停止监控")
+        finally:
+            self.scraper.writer.close()
+            self.scraper.history.close()
+            self.scraper.blocker.detach_all()
+            self.scraper.close_tabs()
+            self.scraper.blocker.log_summary()
+            if self.scraper.rate_controller is not None:
+                self.scraper.rate_controller.log_summary()
+            self._export_metrics()
+            self.scraper.metrics.log_summary()
+            self.scraper.metrics.write_json(os.path.splitext(self.scraper.writer.output_file)[0] + '_metrics.json')
+    
+    def _export_metrics(self):
+        """写入Prometheus textfile（失败不影响监控）"""
+        try:
+            self.scraper.metrics.write_prometheus()
+        except Exception as e:
+            logger.warning(f"写入Prometheus指标失败: {e}")
+    
+    def stop(self):
+        """停止守护进程（当前商品采集完成后退出）"""
+        self._running = False
+
+
+if __name__ == "__main__":
+    MonitorDaemon().run(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -4,14 +4,24 @@
 """
 
 import csv
+import math
 import os
+import sys
+import time
+from array import array
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import config
 
 
+# 输出CSV列名
+CSV_FIELDNAMES = ['商品名', '版本', '磨损度', '售价', '租价(天)', '租售比(%)']
+
+
 class Item:
     """商品数据类"""
+    __slots__ = ('name', 'normal_id', 'dark_gold_id')
+    
     def __init__(self, name: str, normal_id: str, dark_gold_id: str):
         self.name = name.strip()
         self.normal_id = normal_id.strip()
@@ -23,6 +33,8 @@ class Item:
 
 class PriceRecord:
     """价格记录类"""
+    __slots__ = ('item_name', 'version', 'wear_level', 'sell_price', 'rent_price')
+    
     def __init__(self, item_name: str, version: str, wear_level: str, 
                  sell_price: Optional[float] = None, rent_price: Optional[float] = None):
         self.item_name = item_name
@@ -48,6 +60,155 @@ class PriceRecord:
             '租价(天)': self.rent_price if self.rent_price else '',
             '租售比(%)': f"{self.rent_ratio:.4f}" if self.rent_ratio else ''
         }
+    
+    def to_row(self) -> tuple:
+        """转换为CSV行（列顺序与CSV_FIELDNAMES一致）"""
+        return _csv_row(self.item_name, self.version, self.wear_level, self.sell_price, self.rent_price)
+
+
+def _csv_row(item_name: str, version: str, wear_level: str,
+             sell_price: Optional[float], rent_price: Optional[float]) -> tuple:
+    """生成一行CSV数据，格式与PriceRecord.to_dict一致"""
+    ratio = (rent_price / sell_price) * 100 if sell_price and rent_price and sell_price > 0 else None
+    return (
+        item_name,
+        version,
+        wear_level,
+        sell_price if sell_price else '',
+        rent_price if rent_price else '',
+        f"{ratio:.4f}" if ratio else ''
+    )
+
+
+class RecordBatch:
+    """
+    列式价格记录批
+    
+    不为每条记录创建对象：商品名、版本、磨损度存为整数编码（商品名驻留后只保存一份），
+    售价和租价存为array('d')（None记为NaN）。可整批写入CSV或转换为DataFrame，
+    需要逐条处理时迭代得到PriceRecord。
+    """
+    __slots__ = ('names', 'versions', 'wears', '_codes',
+                 'name_codes', 'version_codes', 'wear_codes', 'sell_prices', 'rent_prices')
+    
+    def __init__(self, records: Iterable[PriceRecord] = ()):
+        """
+        创建记录批
+        
+        Args:
+            records: 初始记录
+        """
+        self.names: List[str] = []
+        self.versions: List[str] = ['普通', '暗金']
+        self.wears: List[str] = list(config.WEAR_LEVELS.keys())
+        # 值 -> 编码
+        self._codes: Tuple[dict, dict, dict] = (
+            {},
+            {v: i for i, v in enumerate(self.versions)},
+            {w: i for i, w in enumerate(self.wears)},
+        )
+        self.name_codes = array('I')
+        self.version_codes = array('B')
+        self.wear_codes = array('B')
+        self.sell_prices = array('d')
+        self.rent_prices = array('d')
+        self.extend(records)
+    
+    @staticmethod
+    def _encode(values: List[str], codes: dict, value: str) -> int:
+        """返回值的编码，新值追加到编码表"""
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(sys.intern(value))
+        return code
+    
+    def append(self, item_name: str, version: str, wear_level: str,
+               sell_price: Optional[float] = None, rent_price: Optional[float] = None):
+        """追加一条记录"""
+        name_index, version_index, wear_index = self._codes
+        self.name_codes.append(self._encode(self.names, name_index, item_name))
+        self.version_codes.append(self._encode(self.versions, version_index, version))
+        self.wear_codes.append(self._encode(self.wears, wear_index, wear_level))
+        self.sell_prices.append(math.nan if sell_price is None else sell_price)
+        self.rent_prices.append(math.nan if rent_price is None else rent_price)
+    
+    def extend(self, records: Iterable[PriceRecord]):
+        """追加多条PriceRecord"""
+        for r in records:
+            self.append(r.item_name, r.version, r.wear_level, r.sell_price, r.rent_price)
+    
+    def __len__(self) -> int:
+        return len(self.sell_prices)
+    
+    def rows(self) -> Iterator[tuple]:
+        """逐行返回(商品名, 版本, 磨损度, 售价, 租价)，NaN还原为None"""
+        names, versions, wears = self.names, self.versions, self.wears
+        for n, v, w, sell, rent in zip(self.name_codes, self.version_codes, self.wear_codes,
+                                       self.sell_prices, self.rent_prices):
+            yield (names[n], versions[v], wears[w],
+                   None if sell != sell else sell, None if rent != rent else rent)
+    
+    def __iter__(self) -> Iterator[PriceRecord]:
+        for row in self.rows():
+            yield PriceRecord(*row)
+    
+    def csv_rows(self) -> Iterator[tuple]:
+        """逐行返回CSV数据（格式与PriceRecord.to_dict一致）"""
+        for row in self.rows():
+            yield _csv_row(*row)
+    
+    def to_csv(self, filepath: str) -> str:
+        """
+        整批写入CSV文件
+        
+        Args:
+            filepath: 输出文件路径
+        
+        Returns:
+            输出文件路径
+        """
+        with open(filepath, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDNAMES)
+            writer.writerows(self.csv_rows())
+        return filepath
+    
+    def to_frame(self):
+        """
+        整批转换为pandas DataFrame（商品名、版本、磨损度为分类列，价格为float列）
+        
+        Returns:
+            DataFrame，列为item_name, version, wear_level, sell_price, rent_price
+        """
+        import numpy as np
+        import pandas as pd
+        
+        return pd.DataFrame({
+            'item_name': pd.Categorical.from_codes(np.frombuffer(self.name_codes, dtype=np.uint32).astype(np.int32),
+                                                   categories=pd.Index(self.names).unique()),
+            'version': pd.Categorical.from_codes(np.frombuffer(self.version_codes, dtype=np.uint8).astype(np.int8),
+                                                 categories=self.versions),
+            'wear_level': pd.Categorical.from_codes(np.frombuffer(self.wear_codes, dtype=np.uint8).astype(np.int8),
+                                                    categories=self.wears),
+            'sell_price': np.frombuffer(self.sell_prices, dtype=np.float64).copy(),
+            'rent_price': np.frombuffer(self.rent_prices, dtype=np.float64).copy(),
+        })
+
+
+def add_rent_ratio(df):
+    """
+    计算租售比（百分比），售价为空或不大于0时为NaN
+    
+    Args:
+        df: 含sell_price、rent_price列的DataFrame
+    
+    Returns:
+        增加rent_ratio列后的DataFrame
+    """
+    sell = df['sell_price'].where(df['sell_price'] > 0)
+    df['rent_ratio'] = df['rent_price'] / sell * 100
+    return df
 
 
 def read_items_csv(filepath: str = None) -> List[Item]:
@@ -63,11 +224,22 @@ def read_items_csv(filepath: str = None) -> List[Item]:
     Returns:
         Item对象列表
     """
+    return list(iter_items_csv(filepath))
+
+
+def iter_items_csv(filepath: str = None) -> Iterator[Item]:
+    """
+    逐行读取商品CSV文件（生成器，不把整个文件读入内存）
+    
+    Args:
+        filepath: CSV文件路径，默认使用config中的配置
+    
+    Yields:
+        Item对象
+    """
     if filepath is None:
         filepath = config.INPUT_CSV
     
-    items = []
-    
     with open(filepath, 'r', encoding='utf-8') as f:
         reader = csv.reader(f)
         for row in reader:
@@ -75,42 +247,96 @@ def read_items_csv(filepath: str = None) -> List[Item]:
                 name = row[0].strip()
                 normal_id = row[1].strip()
                 dark_gold_id = row[2].strip()
-                items.append(Item(name, normal_id, dark_gold_id))
-    
-    return items
+                yield Item(name, normal_id, dark_gold_id)
 
 
-def save_results_csv(records: List[PriceRecord], output_dir: str = None) -> str:
+class ResultWriter:
     """
-    保存结果到CSV文件
-    
-    Args:
-        records: PriceRecord列表
-        output_dir: 输出目录，默认使用config中的配置
+    流式结果写入器
     
-    Returns:
-        输出文件路径
+    每次运行只打开一个输出文件，每个商品采集完成后立即追加写入，
+    内存中不保留已写入的记录；定期fsync，下游可以实时tail该文件。
     """
-    if output_dir is None:
-        output_dir = config.OUTPUT_DIR
     
-    # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
+    def __init__(self, output_dir: str = None, fsync_interval: float = None, output_file: str = None):
+        """
+        创建输出文件并写入表头
+        
+        Args:
+            output_dir: 输出目录，默认使用config中的配置
+            fsync_interval: 落盘间隔（秒），默认使用config.FSYNC_INTERVAL
+            output_file: 输出文件路径，指定时忽略output_dir，默认按时间生成文件名
+        """
+        if output_dir is None:
+            output_dir = config.OUTPUT_DIR
+        if fsync_interval is None:
+            fsync_interval = config.FSYNC_INTERVAL
+        
+        if output_file is None:
+            # 生成带日期的文件名
+            date_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+            output_file = os.path.join(output_dir, f"result_{date_str}.csv")
+        
+        # 确保输出目录存在
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        
+        self.output_file = output_file
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        
+        self._file = open(self.output_file, 'w', encoding='utf-8-sig', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(CSV_FIELDNAMES)
+        self._file.flush()
+        self._last_sync = time.monotonic()
+    
+    def write(self, records):
+        """
+        追加写入记录
+        
+        Args:
+            records: PriceRecord列表或RecordBatch
+        """
+        if isinstance(records, RecordBatch):
+            self.write_rows(records.csv_rows())
+        else:
+            self.write_rows(record.to_row() for record in records)
     
-    # 生成带日期的文件名
-    date_str = datetime.now().strftime('%Y%m%d_%H%M%S')
-    output_file = os.path.join(output_dir, f"result_{date_str}.csv")
+    def write_rows(self, rows: Iterable[tuple]) -> int:
+        """
+        追加写入已格式化的CSV行（列顺序与CSV_FIELDNAMES一致）
+        
+        Args:
+            rows: CSV行
+        
+        Returns:
+            写入的行数
+        """
+        count = 0
+        for row in rows:
+            self._writer.writerow(row)
+            count += 1
+        self.count += count
+        self._file.flush()
+        
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_sync = time.monotonic()
+        return count
     
-    # 写入CSV
-    fieldnames = ['商品名', '版本', '磨损度', '售价', '租价(天)', '租售比(%)']
+    def close(self):
+        """落盘并关闭输出文件"""
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
     
-    with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for record in records:
-            writer.writerow(record.to_dict())
+    def __enter__(self):
+        return self
     
-    return output_file
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
 
 def build_url(template_id: str, list_type: int) -> str:
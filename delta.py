@@ -0,0 +1,160 @@
+"""
+增量输出模块
+将本次结果与上一次运行的快照逐行比较，只输出新增、价格变化和消失的行（含原值和新值），
+下游加载和告警只需处理变化的部分
+"""
+
+import argparse
+import csv
+import logging
+import os
+from typing import Dict, Tuple
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+# 增量文件列名
+DELTA_FIELDNAMES = ['变化', '商品名', '版本', '磨损度', '原售价', '售价', '原租价(天)', '租价(天)']
+
+# 变化类型
+CHANGE_NEW = '新增'
+CHANGE_CHANGED = '变化'
+CHANGE_REMOVED = '消失'
+
+
+def load_snapshot(filepath: str = None) -> Dict[Tuple[str, str, str], Tuple[str, str]]:
+    """
+    读取快照
+    
+    快照为制表符分隔的文本，每行：商品名、版本、磨损度、售价、租价（价格为结果文件中的原文，没有价格时为空）。
+    
+    Args:
+        filepath: 快照文件路径，默认使用config.SNAPSHOT_FILE
+    
+    Returns:
+        {(商品名, 版本, 磨损度): (售价, 租价)}，文件不存在时返回空字典
+    """
+    if filepath is None:
+        filepath = config.SNAPSHOT_FILE
+    
+    snapshot = {}
+    if not os.path.exists(filepath):
+        return snapshot
+    
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.reader(f, delimiter='\t'):
+            if len(row) == 5:
+                snapshot[(row[0], row[1], row[2])] = (row[3], row[4])
+    return snapshot
+
+
+def save_snapshot(snapshot: Dict[Tuple[str, str, str], Tuple[str, str]], filepath: str = None) -> str:
+    """
+    写入快照（先写临时文件再替换，中断时保留上一次的快照）
+    
+    Args:
+        snapshot: {(商品名, 版本, 磨损度): (售价, 租价)}
+        filepath: 快照文件路径，默认使用config.SNAPSHOT_FILE
+    
+    Returns:
+        快照文件路径
+    """
+    if filepath is None:
+        filepath = config.SNAPSHOT_FILE
+    
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t')
+        writer.writerows(key + value for key, value in snapshot.items())
+    os.replace(tmp_path, filepath)
+    return filepath
+
+
+def write_delta(result_file: str, snapshot_file: str = None, delta_file: str = None) -> str:
+    """
+    比较结果文件和上一次的快照，写出增量文件并用本次结果替换快照
+    
+    没有任何价格的新行不算新增；快照中有、本次结果中没有的行，只有商品在本次结果中出现时才记为消失
+    （例如暗金版被移除）。本次没有采集的商品（交替运行不同的商品列表时）不报告，保留在快照中。
+    
+    Args:
+        result_file: 本次运行的结果CSV文件
+        snapshot_file: 快照文件路径，默认使用config.SNAPSHOT_FILE
+        delta_file: 增量文件路径，默认为结果文件同目录下的delta_*.csv（result_20240101_120000.csv -> delta_20240101_120000.csv，
+                    不与result_*.csv通配符重叠）
+    
+    Returns:
+        增量文件路径
+    """
+    if delta_file is None:
+        directory, filename = os.path.split(result_file)
+        if filename.startswith('result_'):
+            filename = filename[len('result_'):]
+        delta_file = os.path.join(directory, 'delta_' + filename)
+    
+    previous = load_snapshot(snapshot_file)
+    current = {}
+    item_names = set()
+    counts = {CHANGE_NEW: 0, CHANGE_CHANGED: 0, CHANGE_REMOVED: 0}
+    
+    with open(result_file, 'r', encoding='utf-8-sig', newline='') as src, \
+            open(delta_file, 'w', encoding='utf-8-sig', newline='') as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        writer.writerow(DELTA_FIELDNAMES)
+        next(reader, None)
+        
+        for row in reader:
+            key = (row[0], row[1], row[2])
+            value = (row[3], row[4])
+            current[key] = value
+            item_names.add(row[0])
+            old = previous.pop(key, None)
+            if old is None:
+                if not (value[0] or value[1]):
+                    continue
+                change = CHANGE_NEW
+                old = ('', '')
+            elif old != value:
+                change = CHANGE_CHANGED
+            else:
+                continue
+            writer.writerow((change,) + key + (old[0], value[0], old[1], value[1]))
+            counts[change] += 1
+        
+        kept = {}
+        for key, old in previous.items():
+            if key[0] not in item_names:
+                kept[key] = old
+                continue
+            writer.writerow((CHANGE_REMOVED,) + key + (old[0], '', old[1], ''))
+            counts[CHANGE_REMOVED] += 1
+    
+    save_snapshot({**kept, **current}, snapshot_file)
+    logger.info(
+        f"增量输出: 新增 {counts[CHANGE_NEW]} 行, 变化 {counts[CHANGE_CHANGED]} 行, "
+        f"消失 {counts[CHANGE_REMOVED]} 行 (共 {len(current)} 行) -> {delta_file}"
+    )
+    return delta_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CS2饰品价格爬虫 - 与上一次快照比较生成增量文件")
+    parser.add_argument("result_file", help="结果CSV文件")
+    parser.add_argument("--snapshot", default=None, help="快照文件路径（默认使用config.SNAPSHOT_FILE）")
+    parser.add_argument("--output", default=None, help="增量文件路径（默认为同目录下的delta_*.csv）")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=getattr(logging, config.LOG_LEVEL),
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(config.LOG_FILE, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    write_delta(args.result_file, args.snapshot, args.output)
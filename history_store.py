@@ -0,0 +1,218 @@
+"""
+价格历史库模块
+使用SQLite按(商品名, 版本, 磨损度, 时间)保存每次采集的价格，支持跨运行的索引查询
+"""
+
+import csv
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple, Union
+
+import config
+from data_processor import PriceRecord, RecordBatch, parse_price
+
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class PriceHistoryStore:
+    """
+    价格历史库
+    
+    表结构：
+    prices(item_name, version, wear_level, scraped_at, sell_price, rent_price)
+    主键 (item_name, version, wear_level, scraped_at)，查询“最新价格”“N天前价格”“租售比走势”
+    都只走索引，不需要扫描历史CSV。
+    """
+    
+    def __init__(self, db_path: str = None):
+        """
+        打开（或创建）历史库
+        
+        Args:
+            db_path: 数据库文件路径，默认使用config.HISTORY_DB
+        """
+        if db_path is None:
+            db_path = config.HISTORY_DB
+        
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.db_path = db_path
+        # 允许在创建线程之外的写入线程中使用（同一时间只有一个线程访问）
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS prices (
+                item_name TEXT NOT NULL,
+                version TEXT NOT NULL,
+                wear_level TEXT NOT NULL,
+                scraped_at TEXT NOT NULL,
+                sell_price REAL,
+                rent_price REAL,
+                PRIMARY KEY (item_name, version, wear_level, scraped_at)
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_prices_scraped_at ON prices (scraped_at)')
+        self.conn.commit()
+    
+    def add_records(self, records: Union[RecordBatch, Iterable[PriceRecord]], scraped_at: datetime = None) -> int:
+        """
+        写入一批价格记录（售价和租价都为空的记录不写入）
+        
+        Args:
+            records: PriceRecord列表或RecordBatch
+            scraped_at: 采集时间，默认为当前时间
+        
+        Returns:
+            写入的记录数量
+        """
+        if scraped_at is None:
+            scraped_at = datetime.now()
+        timestamp = scraped_at.strftime(TIME_FORMAT)
+        
+        if isinstance(records, RecordBatch):
+            rows = [
+                (name, version, wear, timestamp, sell, rent)
+                for name, version, wear, sell, rent in records.rows()
+                if sell is not None or rent is not None
+            ]
+        else:
+            rows = [
+                (r.item_name, r.version, r.wear_level, timestamp, r.sell_price, r.rent_price)
+                for r in records
+                if r.sell_price is not None or r.rent_price is not None
+            ]
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+    
+    def latest_price(self, item_name: str, version: str, wear_level: str) -> Optional[Tuple[str, float, float]]:
+        """
+        查询最新价格
+        
+        Returns:
+            (采集时间, 售价, 租价)，没有记录返回None
+        """
+        return self.conn.execute('''
+            SELECT scraped_at, sell_price, rent_price FROM prices
+            WHERE item_name = ? AND version = ? AND wear_level = ?
+            ORDER BY scraped_at DESC LIMIT 1
+        ''', (item_name, version, wear_level)).fetchone()
+    
+    def price_days_ago(self, item_name: str, version: str, wear_level: str,
+                       days: float) -> Optional[Tuple[str, float, float]]:
+        """
+        查询N天前（该时间点之前最近一次采集）的价格
+        
+        Returns:
+            (采集时间, 售价, 租价)，没有记录返回None
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).strftime(TIME_FORMAT)
+        return self.conn.execute('''
+            SELECT scraped_at, sell_price, rent_price FROM prices
+            WHERE item_name = ? AND version = ? AND wear_level = ? AND scraped_at <= ?
+            ORDER BY scraped_at DESC LIMIT 1
+        ''', (item_name, version, wear_level, cutoff)).fetchone()
+    
+    def rent_ratio_trend(self, item_name: str, version: str, wear_level: str,
+                         days: float = 30) -> List[Tuple[str, float]]:
+        """
+        查询最近N天的租售比走势
+        
+        Returns:
+            [(采集时间, 租售比%)] 列表，按时间升序
+        """
+        since = (datetime.now() - timedelta(days=days)).strftime(TIME_FORMAT)
+        return self.conn.execute('''
+            SELECT scraped_at, rent_price * 100.0 / sell_price FROM prices
+            WHERE item_name = ? AND version = ? AND wear_level = ? AND scraped_at >= ?
+              AND sell_price > 0 AND rent_price IS NOT NULL
+            ORDER BY scraped_at
+        ''', (item_name, version, wear_level, since)).fetchall()
+    
+    def volatility(self, item_name: str, days: float = 7) -> Optional[float]:
+        """
+        计算商品最近N天的价格波动率
+        
+        对每个(版本, 磨损度)取相邻两次采集的售价、租价相对变化的绝对值，返回其平均值中较大的一个。
+        
+        Returns:
+            波动率（0.05表示平均每次变化5%），数据不足返回None
+        """
+        since = (datetime.now() - timedelta(days=days)).strftime(TIME_FORMAT)
+        row = self.conn.execute('''
+            SELECT AVG(ABS(sell_price - prev_sell) / prev_sell), AVG(ABS(rent_price - prev_rent) / prev_rent)
+            FROM (
+                SELECT sell_price, rent_price,
+                       LAG(sell_price) OVER w AS prev_sell,
+                       LAG(rent_price) OVER w AS prev_rent
+                FROM prices
+                WHERE item_name = ? AND scraped_at >= ?
+                WINDOW w AS (PARTITION BY version, wear_level ORDER BY scraped_at)
+            )
+            WHERE prev_sell > 0 OR prev_rent > 0
+        ''', (item_name, since)).fetchone()
+        
+        values = [v for v in row if v is not None] if row else []
+        return max(values) if values else None
+    
+    def load_batch(self, days: float = None) -> RecordBatch:
+        """
+        按采集时间顺序读取历史价格到记录批（不为每行创建PriceRecord）
+        
+        Args:
+            days: 只读取最近N天，默认读取全部
+        
+        Returns:
+            RecordBatch记录批
+        """
+        since = (datetime.now() - timedelta(days=days)).strftime(TIME_FORMAT) if days is not None else ''
+        cursor = self.conn.execute('''
+            SELECT item_name, version, wear_level, sell_price, rent_price FROM prices
+            WHERE scraped_at >= ?
+            ORDER BY scraped_at
+        ''', (since,))
+        
+        batch = RecordBatch()
+        for row in cursor:
+            batch.append(*row)
+        return batch
+    
+    def import_results_csv(self, filepath: str) -> int:
+        """
+        导入历史结果文件（result_YYYYMMDD_HHMMSS.csv），采集时间取自文件名
+        
+        Args:
+            filepath: 结果CSV文件路径
+        
+        Returns:
+            写入的记录数量
+        """
+        match = re.search(r'(\d{8}_\d{6})', os.path.basename(filepath))
+        if match:
+            scraped_at = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+        else:
+            scraped_at = datetime.fromtimestamp(os.path.getmtime(filepath))
+        
+        records = RecordBatch()
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                records.append(row['商品名'], row['版本'], row['磨损度'],
+                               parse_price(row['售价']), parse_price(row['租价(天)']))
+        return self.add_records(records, scraped_at)
+    
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    # 导入output目录下已有的结果文件
+    import glob
+    
+    store = PriceHistoryStore()
+    for path in sorted(glob.glob(os.path.join(config.OUTPUT_DIR, 'result_*.csv'))):
+        print(f"导入 {path}: {store.import_results_csv(path)} 条记录")
+    store.close()
@@ -0,0 +1,210 @@
+"""
+运行指标模块
+统计各阶段耗时（直方图）和页面结果计数，运行结束时输出JSON汇总，持续监控时定期写Prometheus textfile
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """耗时直方图（累计桶，与Prometheus histogram一致）"""
+    
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def observe(self, value: float):
+        """记录一次耗时（秒）"""
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+    
+    def quantile(self, q: float) -> float:
+        """按桶边界线性插值估算分位数（不超过最大值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        prev_bound, prev_count = 0.0, 0
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                if count == prev_count:
+                    return min(bound, self.max)
+                estimate = prev_bound + (bound - prev_bound) * (rank - prev_count) / (count - prev_count)
+                return min(estimate, self.max)
+            prev_bound, prev_count = bound, count
+        # 落在最后一个桶之外
+        return self.max
+    
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p90': round(self.quantile(0.9), 6),
+            'p99': round(self.quantile(0.99), 6),
+            'max': round(self.max, 6),
+            'buckets': dict(zip([str(b) for b in self.buckets], self.counts)),
+        }
+
+
+class _Timer:
+    """计时上下文，退出时记录到指定阶段"""
+    
+    __slots__ = ('registry', 'stage', 'start')
+    
+    def __init__(self, registry: 'MetricsRegistry', stage: str):
+        self.registry = registry
+        self.stage = stage
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+    
+    用法：
+        with metrics.timer('navigate'):
+            tab.get(url)
+        metrics.inc('pages_success')
+    多个标签页线程共享同一个注册表。
+    """
+    
+    def __init__(self, buckets: List[float] = None):
+        """
+        Args:
+            buckets: 直方图桶边界（秒），默认使用config.METRICS_BUCKETS
+        """
+        self.bucket_bounds = list(config.METRICS_BUCKETS if buckets is None else buckets)
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+    
+    def timer(self, stage: str) -> _Timer:
+        """返回计时上下文"""
+        return _Timer(self, stage)
+    
+    def observe(self, stage: str, seconds: float):
+        """记录一次阶段耗时"""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.bucket_bounds)
+            histogram.observe(seconds)
+    
+    def inc(self, name: str, amount: int = 1):
+        """计数器加一"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+            self.started_at = time.time()
+    
+    def snapshot(self) -> Dict:
+        """返回当前指标的字典"""
+        with self._lock:
+            return {
+                'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+                'elapsed': round(time.time() - self.started_at, 3),
+                'counters': dict(self.counters),
+                'timers': {stage: h.to_dict() for stage, h in sorted(self.histograms.items())},
+            }
+    
+    def write_json(self, filepath: str) -> str:
+        """
+        写入JSON汇总
+        
+        Args:
+            filepath: 输出文件路径
+        
+        Returns:
+            输出文件路径
+        """
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        return filepath
+    
+    def write_prometheus(self, filepath: str = None) -> str:
+        """
+        写入Prometheus textfile（供node_exporter的textfile collector读取）
+        
+        先写临时文件再替换，避免采集器读到写了一半的文件。
+        
+        Args:
+            filepath: 输出文件路径，默认使用config.METRICS_PROM_FILE
+        
+        Returns:
+            输出文件路径
+        """
+        if filepath is None:
+            filepath = config.METRICS_PROM_FILE
+        
+        with self._lock:
+            lines = [
+                '# HELP youpin_stage_seconds Time spent in each scrape stage.',
+                '# TYPE youpin_stage_seconds histogram',
+            ]
+            for stage, h in sorted(self.histograms.items()):
+                for bound, count in zip(h.buckets, h.counts):
+                    lines.append(f'youpin_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'youpin_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'youpin_stage_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'youpin_stage_seconds_count{{stage="{stage}"}} {h.count}')
+            lines.append('# HELP youpin_events_total Scrape event counters.')
+            lines.append('# TYPE youpin_events_total counter')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'youpin_events_total{{event="{name}"}} {value}')
+            lines.append('# HELP youpin_start_time_seconds Unix time the metrics started.')
+            lines.append('# TYPE youpin_start_time_seconds gauge')
+            lines.append(f'youpin_start_time_seconds {self.started_at:.0f}')
+        
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        tmp_path = filepath + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, filepath)
+        return filepath
+    
+    def log_summary(self):
+        """输出各阶段耗时统计"""
+        snapshot = self.snapshot()
+        if snapshot['counters']:
+            logger.info("页面计数: " + ", ".join(f"{k}={v}" for k, v in sorted(snapshot['counters'].items())))
+        for stage, t in snapshot['timers'].items():
+            logger.info(
+                f"阶段耗时 {stage}: {t['count']} 次, 合计 {t['sum']:.1f} 秒, "
+                f"平均 {t['mean'] * 1000:.0f} ms, p50 {t['p50'] * 1000:.0f} ms, p99 {t['p99'] * 1000:.0f} ms"
+            )
+
+
+# 进程内共享的默认注册表
+default_registry = MetricsRegistry()
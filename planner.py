@@ -0,0 +1,112 @@
+"""
+采集计划模块
+在读取商品列表之后、开始采集之前去重商品和templateId，剔除无效ID，统计节省的页面访问次数
+"""
+
+import logging
+from typing import Iterable, Iterator, List, Set, Tuple
+
+from data_processor import Item
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_template_id(template_id: str) -> str:
+    """
+    规范化templateId，占位符（0、-、N/A等）和非数字ID返回空字符串
+    
+    Args:
+        template_id: 原始templateId
+    
+    Returns:
+        有效的templateId或空字符串
+    """
+    template_id = template_id.strip()
+    if template_id.isdigit() and int(template_id) > 0:
+        return template_id
+    return ''
+
+
+class ScrapePlan:
+    """
+    采集计划
+    
+    items为去重后的商品列表（无效ID已清空，没有任何有效ID的商品已剔除）；
+    每个templateId在整个运行中只访问一次售价页面，售价页面没有任何磨损度时不访问租价页面。
+    """
+    
+    def __init__(self):
+        self.items: List[Item] = []  # 流式计划（iter_plan）不保存商品列表
+        self.template_ids: Set[str] = set()  # 去重后的templateId
+        self.item_count = 0  # 计划采集的商品数
+        self.naive_pages = 0  # 不做计划时需要访问的页面数
+        self.duplicate_rows = 0  # 重复的商品行
+        self.invalid_ids = 0  # 无效/占位的templateId
+        self._seen_rows: Set[Tuple[str, str, str]] = set()
+    
+    @property
+    def planned_pages(self) -> int:
+        """计划访问的页面数上限（售价页面无数据时租价页面还会进一步省略）"""
+        return len(self.template_ids) * 2
+    
+    @property
+    def saved_pages(self) -> int:
+        """计划阶段节省的页面访问次数"""
+        return self.naive_pages - self.planned_pages
+    
+    def log_summary(self):
+        """输出计划统计"""
+        logger.info(
+            f"采集计划: {self.item_count} 个商品, {len(self.template_ids)} 个templateId, "
+            f"计划访问 {self.planned_pages} 个页面 (原需 {self.naive_pages} 个, 节省 {self.saved_pages} 个; "
+            f"重复行 {self.duplicate_rows}, 无效ID {self.invalid_ids})"
+        )
+
+
+def build_plan(items: Iterable[Item]) -> ScrapePlan:
+    """
+    根据商品列表生成采集计划
+    
+    Args:
+        items: read_items_csv返回的商品列表
+    
+    Returns:
+        ScrapePlan对象
+    """
+    plan = ScrapePlan()
+    plan.items = list(iter_plan(items, plan))
+    return plan
+
+
+def iter_plan(items: Iterable[Item], plan: ScrapePlan) -> Iterator[Item]:
+    """
+    流式生成采集计划：逐个规范化、去重商品，统计信息累积到plan中
+    
+    Args:
+        items: 商品迭代器（如iter_items_csv）
+        plan: 用于累积统计和去重状态的ScrapePlan
+    
+    Yields:
+        规范化后的Item对象
+    """
+    for item in items:
+        raw_ids = [item.normal_id, item.dark_gold_id]
+        # 原流程：非空ID都会访问售价和租价两个页面
+        plan.naive_pages += sum(2 for tid in raw_ids if tid)
+        
+        normal_id, dark_gold_id = [normalize_template_id(tid) for tid in raw_ids]
+        plan.invalid_ids += sum(1 for raw, tid in zip(raw_ids, (normal_id, dark_gold_id)) if raw and not tid)
+        
+        if not normal_id and not dark_gold_id:
+            continue
+        
+        key = (item.name, normal_id, dark_gold_id)
+        if key in plan._seen_rows:
+            plan.duplicate_rows += 1
+            continue
+        plan._seen_rows.add(key)
+        
+        plan.item_count += 1
+        plan.template_ids.update(tid for tid in (normal_id, dark_gold_id) if tid)
+        yield Item(item.name, normal_id, dark_gold_id)
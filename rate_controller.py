@@ -0,0 +1,163 @@
+"""
+自适应限速模块
+令牌桶 + 加性增/乘性减（AIMD）控制访问速率，替代固定的随机延迟
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import List, Tuple
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateController:
+    """
+    自适应速率控制器
+    
+    以令牌桶控制页面访问速率（页/秒）：
+    - 页面正常返回价格时，速率加性增加 RATE_INCREASE
+    - 页面为空、超时或出错时，速率乘以 RATE_DECREASE
+    速率限制在 [RATE_MIN, RATE_MAX] 之间，多个标签页共享同一个控制器时也是线程安全的。
+    RATE_*配置的是每个标签页的速率：多个标签页/访问协程共享控制器时由set_workers按数量放大速率和令牌桶容量，
+    总吞吐量随标签页数增长，任一标签页遇到异常时所有标签页一起减速。
+    """
+    
+    def __init__(self, initial_rate: float = None, min_rate: float = None, max_rate: float = None,
+                 increase: float = None, decrease: float = None, burst: int = None):
+        """
+        初始化速率控制器
+        
+        Args:
+            initial_rate: 初始速率（页/秒），默认使用config.RATE_INITIAL
+            min_rate: 最低速率，默认使用config.RATE_MIN
+            max_rate: 最高速率，默认使用config.RATE_MAX
+            increase: 每次成功后增加的速率，默认使用config.RATE_INCREASE
+            decrease: 每次失败后速率的乘数，默认使用config.RATE_DECREASE
+            burst: 令牌桶容量，默认使用config.RATE_BURST
+        """
+        self.min_rate = config.RATE_MIN if min_rate is None else min_rate
+        self.max_rate = config.RATE_MAX if max_rate is None else max_rate
+        self.increase = config.RATE_INCREASE if increase is None else increase
+        self.decrease = config.RATE_DECREASE if decrease is None else decrease
+        self.burst = config.RATE_BURST if burst is None else burst
+        
+        initial_rate = config.RATE_INITIAL if initial_rate is None else initial_rate
+        self.rate = min(max(initial_rate, self.min_rate), self.max_rate)
+        
+        self.workers = 1  # 共享控制器的标签页/访问协程数
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        
+        self.successes = 0
+        self.failures = 0
+        self.total_sleep = 0.0
+        # 速率变化历史：(时间戳, 速率, 事件)
+        self.history: deque = deque(maxlen=config.RATE_HISTORY_SIZE)
+        self.history.append((time.time(), self.rate, 'start'))
+    
+    def _refill(self, now: float):
+        """按当前速率补充令牌"""
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+    
+    def set_workers(self, workers: int):
+        """
+        设置共享控制器的标签页/访问协程数，速率上下限、增量、当前速率和令牌桶容量按比例缩放
+        
+        Args:
+            workers: 并发数（小于1时按1计算）
+        """
+        workers = max(1, workers)
+        with self._lock:
+            factor = workers / self.workers
+            if factor == 1:
+                return
+            self._refill(time.monotonic())
+            self.workers = workers
+            self.min_rate *= factor
+            self.max_rate *= factor
+            self.increase *= factor
+            self.rate *= factor
+            self.burst = self.burst * factor
+            self._tokens = min(self._tokens * factor, self.burst)
+            self.history.append((time.time(), self.rate, f'workers={workers}'))
+        logger.info(f"速率控制按 {workers} 个标签页缩放: 当前速率 {self.rate:.2f} 页/秒, 上限 {self.max_rate:.2f} 页/秒")
+    
+    def acquire(self) -> float:
+        """
+        获取一个令牌，令牌不足时等待
+        
+        Returns:
+            实际等待的秒数
+        """
+        delay = self.reserve()
+        if delay > 0:
+            logger.debug(f"等待 {delay:.2f} 秒 (当前速率 {self.rate:.2f} 页/秒)...")
+            time.sleep(delay)
+        return delay
+    
+    def reserve(self) -> float:
+        """
+        预订一个令牌但不等待（异步调用方自行await asyncio.sleep）
+        
+        Returns:
+            需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # 预先扣除令牌，等待时间由欠下的令牌数决定，多线程时自然排队
+            self._tokens -= 1
+            delay = 0.0
+            if self._tokens < 0:
+                delay = -self._tokens / self.rate
+                # 加入随机抖动，避免访问间隔过于规律
+                delay *= random.uniform(1 - config.RATE_JITTER, 1 + config.RATE_JITTER)
+            self.total_sleep += delay
+        return delay
+    
+    def on_success(self):
+        """页面正常返回价格：加性增加速率"""
+        with self._lock:
+            self.successes += 1
+            old_rate = self.rate
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            if self.rate != old_rate:
+                self.history.append((time.time(), self.rate, 'success'))
+            total = self.successes + self.failures
+        
+        if total % config.RATE_LOG_INTERVAL == 0:
+            logger.info(f"当前访问速率: {self.rate:.2f} 页/秒 (成功 {self.successes}, 失败 {self.failures})")
+    
+    def on_failure(self, reason: str = 'error'):
+        """
+        页面为空、超时或出错：乘性降低速率
+        
+        Args:
+            reason: 失败原因（empty/timeout/error）
+        """
+        with self._lock:
+            self.failures += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.history.append((time.time(), self.rate, reason))
+        logger.warning(f"页面异常({reason})，降低访问速率至 {self.rate:.2f} 页/秒")
+    
+    def recent_history(self, count: int = 10) -> List[Tuple[float, float, str]]:
+        """返回最近的速率变化记录"""
+        return list(self.history)[-count:]
+    
+    def log_summary(self):
+        """输出速率控制统计"""
+        logger.info(
+            f"速率控制统计: 成功 {self.successes} 页, 失败 {self.failures} 页, "
+            f"累计等待 {self.total_sleep:.1f} 秒, 最终速率 {self.rate:.2f} 页/秒"
+        )
+        for timestamp, rate, event in self.recent_history():
+            logger.debug(f"  {time.strftime('%H:%M:%S', time.localtime(timestamp))} {event}: {rate:.2f} 页/秒")
@@ -0,0 +1,123 @@
+"""
+请求拦截模块
+通过CDP在采集用的标签页上屏蔽图片、字体、媒体和统计脚本，并统计本次运行的请求数和传输字节数
+"""
+
+import logging
+import threading
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Set
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestBlocker:
+    """
+    标签页请求屏蔽与流量统计
+    
+    屏蔽使用Network.setBlockedURLs（支持*通配符），被屏蔽的请求不会发出；
+    统计来自Network事件：requestWillBeSent计请求数，loadingFinished累加encodedDataLength，
+    loadingFailed中带blockedReason的计为屏蔽。同时按标签页记录已发出、尚未完成的请求，
+    供等待页面内容时判断网络是否真正空闲（Resource Timing只记录已完成的请求）。多个标签页共享同一个对象。
+    """
+    
+    # 长连接请求不会结束，不计入进行中的请求
+    LONG_LIVED_TYPES = ('WebSocket', 'EventSource')
+    
+    def __init__(self, patterns: Sequence[str] = None):
+        """
+        Args:
+            patterns: 屏蔽的URL模式，默认BLOCK_RESOURCES为True时使用config.BLOCKED_URL_PATTERNS，否则只统计不屏蔽
+        """
+        if patterns is None:
+            patterns = config.BLOCKED_URL_PATTERNS if config.BLOCK_RESOURCES else ()
+        self.patterns: List[str] = list(patterns)
+        self.requests = 0  # 请求数（含被屏蔽的）
+        self.blocked = 0  # 被屏蔽的请求数
+        self.failed = 0  # 其他原因失败的请求数
+        self.bytes = 0  # 实际传输的字节数
+        self._tabs = []
+        self._inflight: Dict[int, Set[str]] = {}  # id(标签页) -> 进行中的requestId
+        self._lock = threading.Lock()
+    
+    def attach(self, tab) -> bool:
+        """
+        在标签页上启用屏蔽和统计
+        
+        Args:
+            tab: 标签页对象
+        
+        Returns:
+            是否成功
+        """
+        try:
+            key = id(tab)
+            with self._lock:
+                self._inflight[key] = set()
+            tab.run_cdp('Network.enable')
+            tab.run_cdp('Network.setBlockedURLs', urls=self.patterns)
+            tab.driver.set_callback('Network.requestWillBeSent', partial(self._on_request, key))
+            tab.driver.set_callback('Network.loadingFinished', partial(self._on_finished, key))
+            tab.driver.set_callback('Network.loadingFailed', partial(self._on_failed, key))
+        except Exception as e:
+            logger.warning(f"启用请求屏蔽失败: {e}")
+            with self._lock:
+                self._inflight.pop(id(tab), None)
+            return False
+        self._tabs.append(tab)
+        return True
+    
+    def pending(self, tab) -> Optional[int]:
+        """
+        标签页上已发出、尚未完成的请求数
+        
+        Returns:
+            请求数，标签页未启用统计时返回None（无法判断）
+        """
+        with self._lock:
+            inflight = self._inflight.get(id(tab))
+            return None if inflight is None else len(inflight)
+    
+    def detach_all(self):
+        """取消所有标签页上的屏蔽和统计（接管的浏览器恢复正常浏览）"""
+        for tab in self._tabs:
+            try:
+                tab.driver.set_callback('Network.requestWillBeSent', None)
+                tab.driver.set_callback('Network.loadingFinished', None)
+                tab.driver.set_callback('Network.loadingFailed', None)
+                tab.run_cdp('Network.setBlockedURLs', urls=[])
+            except Exception as e:
+                logger.debug(f"取消请求屏蔽时出错: {e}")
+        self._tabs = []
+        with self._lock:
+            self._inflight = {}
+    
+    def _on_request(self, key: int, **kwargs):
+        with self._lock:
+            self.requests += 1
+            inflight = self._inflight.get(key)
+            if inflight is not None and kwargs.get('type') not in self.LONG_LIVED_TYPES:
+                inflight.add(kwargs.get('requestId'))
+    
+    def _on_finished(self, key: int, **kwargs):
+        with self._lock:
+            self.bytes += int(kwargs.get('encodedDataLength') or 0)
+            self._inflight.get(key, set()).discard(kwargs.get('requestId'))
+    
+    def _on_failed(self, key: int, **kwargs):
+        with self._lock:
+            self._inflight.get(key, set()).discard(kwargs.get('requestId'))
+            if kwargs.get('blockedReason'):
+                self.blocked += 1
+            else:
+                self.failed += 1
+    
+    def log_summary(self):
+        """输出流量统计"""
+        logger.info(
+            f"网络请求统计: 请求 {self.requests} 个, 屏蔽 {self.blocked} 个, 失败 {self.failed} 个, "
+            f"传输 {self.bytes / 1024 / 1024:.2f} MB"
+        )
@@ -0,0 +1,152 @@
+"""
+页面结果缓存模块
+按(templateId, listType)在磁盘上缓存最近采集的价格，有效期内直接返回，不再访问页面
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """
+    带有效期和容量上限的页面结果缓存（SQLite）
+    
+    - 超过有效期（TTL）的条目视为未命中
+    - 条目数超过上限时，按最近访问时间淘汰最旧的条目（LRU）
+    多个标签页线程共享同一个缓存对象；分片运行时多个进程共用同一个缓存文件（WAL模式，写冲突时等待）。
+    """
+    
+    # 每写入多少次检查一次容量
+    EVICT_CHECK_INTERVAL = 100
+    # 其他进程正在写入时最多等待的秒数
+    BUSY_TIMEOUT = 30
+    
+    def __init__(self, db_path: str = None, ttl: float = None, max_entries: int = None):
+        """
+        打开（或创建）缓存
+        
+        Args:
+            db_path: 缓存文件路径，默认使用config.PAGE_CACHE_FILE
+            ttl: 有效期（秒），默认使用config.PAGE_CACHE_TTL
+            max_entries: 最大条目数，默认使用config.PAGE_CACHE_MAX_ENTRIES
+        """
+        if db_path is None:
+            db_path = config.PAGE_CACHE_FILE
+        if ttl is None:
+            ttl = config.PAGE_CACHE_TTL
+        if max_entries is None:
+            max_entries = config.PAGE_CACHE_MAX_ENTRIES
+        
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=self.BUSY_TIMEOUT, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS page_cache (
+                template_id TEXT NOT NULL,
+                list_type INTEGER NOT NULL,
+                prices TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (template_id, list_type)
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_page_cache_accessed ON page_cache (accessed_at)')
+        self.conn.commit()
+    
+    def get(self, template_id: str, list_type: int) -> Optional[Dict[str, Optional[float]]]:
+        """
+        读取缓存
+        
+        Returns:
+            有效期内的{磨损度: 价格}字典，未命中返回None
+        """
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT prices FROM page_cache WHERE template_id = ? AND list_type = ? AND fetched_at >= ?',
+                (template_id, list_type, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            try:
+                with self.conn:
+                    self.conn.execute(
+                        'UPDATE page_cache SET accessed_at = ? WHERE template_id = ? AND list_type = ?',
+                        (now, template_id, list_type)
+                    )
+            except sqlite3.OperationalError as e:
+                # 只影响LRU淘汰顺序，不影响命中
+                logger.debug(f"更新缓存访问时间失败: {e}")
+        return json.loads(row[0])
+    
+    def put(self, template_id: str, list_type: int, prices: Dict[str, Optional[float]]):
+        """
+        写入缓存，超过容量上限时淘汰最久未访问的条目
+        
+        Args:
+            template_id: 商品模板ID
+            list_type: 页面类型（10=售价，30=租价）
+            prices: {磨损度: 价格} 字典
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO page_cache VALUES (?, ?, ?, ?, ?)',
+                (template_id, list_type, json.dumps(prices, ensure_ascii=False), now, now)
+            )
+            self._puts += 1
+            if self._puts % self.EVICT_CHECK_INTERVAL == 0:
+                self._evict()
+    
+    def _evict(self):
+        """淘汰超出容量上限的最久未访问条目（调用方持有锁）"""
+        self.conn.execute('''
+            DELETE FROM page_cache WHERE rowid IN (
+                SELECT rowid FROM page_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_entries,))
+    
+    def purge_expired(self) -> int:
+        """
+        删除所有过期条目
+        
+        Returns:
+            删除的条目数量
+        """
+        with self._lock, self.conn:
+            cursor = self.conn.execute('DELETE FROM page_cache WHERE fetched_at < ?', (time.time() - self.ttl,))
+        return cursor.rowcount
+    
+    def log_summary(self):
+        """输出缓存命中统计"""
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0
+        logger.info(f"页面缓存统计: 命中 {self.hits}, 未命中 {self.misses}, 命中率 {hit_rate:.1f}%")
+    
+    def close(self):
+        """淘汰超出容量的条目并关闭缓存"""
+        with self._lock:
+            with self.conn:
+                self._evict()
+            self.conn.close()
@@ -0,0 +1,164 @@
+"""
+延迟重试模块
+主流程中加载失败的页面放入重试队列，不阻塞其他页面；主流程结束后按指数退避重试，
+重试成功后修补结果文件中对应的行
+"""
+
+import csv
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import config
+from data_processor import PriceRecord, RecordBatch, parse_price
+
+
+logger = logging.getLogger(__name__)
+
+
+class RetryQueue:
+    """
+    失败页面的重试队列
+    
+    每个(templateId, listType)第n次失败后，在 RETRY_BASE_DELAY * 2^(n-1) 秒（不超过RETRY_MAX_DELAY）后到期，
+    最多重试RETRY_MAX_ATTEMPTS次。队列同时记录每个templateId被哪些(商品名, 版本)使用，用于修补结果文件。
+    """
+    
+    def __init__(self, max_attempts: int = None, base_delay: float = None, max_delay: float = None):
+        """
+        Args:
+            max_attempts: 最多重试次数，默认使用config.RETRY_MAX_ATTEMPTS
+            base_delay: 第一次重试前的等待时间（秒），默认使用config.RETRY_BASE_DELAY
+            max_delay: 最长等待时间（秒），默认使用config.RETRY_MAX_DELAY
+        """
+        self.max_attempts = config.RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.base_delay = config.RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        
+        self._heap: List[Tuple[float, int, Tuple[str, int]]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.failures: Dict[Tuple[str, int], int] = {}  # 每个页面的失败次数
+        self.resolved: Dict[Tuple[str, int], Dict[str, Optional[float]]] = {}  # 重试成功的页面
+        self.exhausted: Set[Tuple[str, int]] = set()  # 重试次数用完仍失败的页面
+        self.rows: Dict[str, Set[Tuple[str, str]]] = {}  # templateId -> {(商品名, 版本)}
+    
+    def add(self, template_id: str, list_type: int, reason: str = ''):
+        """记录一次页面失败，安排下一次重试"""
+        key = (template_id, list_type)
+        with self._lock:
+            attempts = self.failures.get(key, 0) + 1
+            self.failures[key] = attempts
+            if attempts > self.max_attempts:
+                self.exhausted.add(key)
+                logger.warning(f"页面重试 {self.max_attempts} 次仍失败: templateId={template_id}, listType={list_type}")
+                return
+            delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), key))
+        logger.info(f"页面失败({reason})，{delay:.0f} 秒后重试: templateId={template_id}, listType={list_type}")
+    
+    def has_failures(self, template_id: str) -> bool:
+        """该templateId是否有页面失败过"""
+        return (template_id, config.LIST_TYPE_SELL) in self.failures or \
+            (template_id, config.LIST_TYPE_RENT) in self.failures
+    
+    def register(self, template_id: str, item_name: str, version: str):
+        """记录使用该templateId的结果行（只记录有失败页面的templateId）"""
+        if self.has_failures(template_id):
+            with self._lock:
+                self.rows.setdefault(template_id, set()).add((item_name, version))
+    
+    def pop_due(self) -> Optional[Tuple[Tuple[str, int], float]]:
+        """
+        取出最早到期的页面
+        
+        Returns:
+            ((templateId, listType), 距到期的秒数)，队列为空返回None
+        """
+        with self._lock:
+            if not self._heap:
+                return None
+            due, _, key = heapq.heappop(self._heap)
+        return key, max(0.0, due - time.monotonic())
+    
+    def resolve(self, template_id: str, list_type: int, prices: Dict[str, Optional[float]]):
+        """记录重试成功的页面"""
+        with self._lock:
+            self.resolved[(template_id, list_type)] = prices
+        logger.info(f"重试成功: templateId={template_id}, listType={list_type}")
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def patch_results(self, filepath: str) -> RecordBatch:
+        """
+        用重试成功的价格修补结果文件（写入临时文件后替换）
+        
+        Args:
+            filepath: 结果CSV文件路径
+        
+        Returns:
+            修补后的记录（用于写入价格历史库）
+        """
+        patches: Dict[Tuple[str, str], Tuple[Optional[dict], Optional[dict]]] = {}
+        for template_id, rows in self.rows.items():
+            sell_prices = self.resolved.get((template_id, config.LIST_TYPE_SELL))
+            rent_prices = self.resolved.get((template_id, config.LIST_TYPE_RENT))
+            if sell_prices is None and rent_prices is None:
+                continue
+            for row in rows:
+                patches[row] = (sell_prices, rent_prices)
+        
+        patched = RecordBatch()
+        if not patches:
+            return patched
+        
+        tmp_path = filepath + '.tmp'
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as src, \
+                open(tmp_path, 'w', encoding='utf-8-sig', newline='') as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst)
+            writer.writerow(next(reader))
+            for row in reader:
+                patch = patches.get((row[0], row[1]))
+                if patch is not None:
+                    sell_prices, rent_prices = patch
+                    record = PriceRecord(
+                        item_name=row[0],
+                        version=row[1],
+                        wear_level=row[2],
+                        sell_price=sell_prices.get(row[2]) if sell_prices is not None else parse_price(row[3]),
+                        rent_price=rent_prices.get(row[2]) if rent_prices is not None else parse_price(row[4])
+                    )
+                    patched.append(record.item_name, record.version, record.wear_level,
+                                   record.sell_price, record.rent_price)
+                    row = record.to_row()
+                writer.writerow(row)
+        os.replace(tmp_path, filepath)
+        
+        logger.info(f"已用重试结果修补 {len(patched)} 行: {filepath}")
+        return patched
+    
+    def missing(self) -> Set[Tuple[str, int]]:
+        """重试后仍没有数据的页面"""
+        return set(self.failures) - set(self.resolved)
+    
+    def log_summary(self, pages_total: int):
+        """
+        输出覆盖率统计
+        
+        Args:
+            pages_total: 本次运行主流程加载的页面总数（不含本次运行内去重的页面和重试阶段的加载）
+        """
+        missing = len(self.missing())
+        recovered = len(self.failures) - missing
+        coverage = (pages_total - missing) / pages_total * 100 if pages_total else 100.0
+        logger.info(
+            f"覆盖率: {coverage:.1f}% ({pages_total - missing}/{pages_total} 页), "
+            f"失败页面 {len(self.failures)} 个, 重试恢复 {recovered} 个, "
+            f"仍缺失 {missing} 个 (重试次数用完 {len(self.exhausted)} 个)"
+        )
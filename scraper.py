@@ -3,20 +3,38 @@ CS2饰品爬虫主程序
 使用DrissionPage自动化采集悠悠有品网站的饰品价格
 """
 
+import argparse
 import random
 import time
 import logging
+import urllib.request
+from urllib.parse import parse_qs, urlparse
 import re
 import subprocess
 import os
-from typing import Dict, List, Optional, Tuple
+import queue
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
 
-from DrissionPage import ChromiumPage, ChromiumOptions
-from DrissionPage.errors import ElementNotFoundError
+from DrissionPage import ChromiumPage, ChromiumOptions, SessionPage
+from requests import Session
+from requests.adapters import HTTPAdapter
 
 import config
+from checkpoint import ProgressJournal
+from columnar import ColumnarWriter
+from delta import write_delta
+from history_store import PriceHistoryStore
+from metrics import MetricsRegistry, default_registry
+from planner import ScrapePlan, iter_plan
+from rate_controller import AdaptiveRateController
+from request_blocker import RequestBlocker
+from result_cache import PageCache
+from retry_queue import RetryQueue
+from session_service import SessionLease, lease_tabs
 from data_processor import (
-    Item, PriceRecord, read_items_csv, save_results_csv, 
+    Item, RecordBatch, ResultWriter, iter_items_csv,
     build_url, parse_price
 )
 
@@ -33,10 +51,93 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# 磨损度+价格合并正则：一次匹配同时得到磨损度名称和价格
+WEAR_PRICE_PATTERN = re.compile(
+    r'(?P<wear>' + '|'.join(re.escape(wear) for wear in config.WEAR_LEVELS) + r')'
+    r'.*?(?:[¥￥]\s*(?P<yuan>[\d,]+\.?\d*)|(?P<day>[\d,]+\.?\d*)\s*/天|(?P<unit>[\d,]+\.?\d*)\s*元)',
+    re.S
+)
+
+# 一次脚本调用取回所有磨损度按钮文本（已过滤StatTrak按钮）
+BUTTON_TEXTS_JS = '''
+let btns = document.querySelectorAll('[class^="btn-box___"]');
+if (!btns.length) {
+    btns = document.querySelectorAll('[class*="btn-box"]');
+}
+const texts = [];
+for (const btn of btns) {
+    const text = (btn.innerText || btn.textContent || '').trim();
+    if (text && !text.includes('StatTrak') && !text.includes('★')) {
+        texts.push(text);
+    }
+}
+return texts;
+'''
+
+# 页面就绪状态：有磨损度按钮 -> ready；加载完成且显示“暂无”提示 -> empty；
+# 加载完成且最近NETWORK_IDLE_MS毫秒内没有资源请求完成 -> idle（还需确认没有进行中的请求）；否则 -> loading
+PAGE_STATE_JS = '''
+if (document.querySelector('[class^="btn-box___"]') || document.querySelector('[class*="btn-box"]')) {
+    return 'ready';
+}
+if (document.readyState !== 'complete') {
+    return 'loading';
+}
+const text = document.body ? document.body.innerText : '';
+for (const marker of arguments[0].split('|')) {
+    if (marker && text.includes(marker)) {
+        return 'empty';
+    }
+}
+let last = 0;
+for (const entry of performance.getEntriesByType('resource')) {
+    last = Math.max(last, entry.responseEnd);
+}
+return performance.now() - last >= arguments[1] ? 'idle' : 'loading';
+'''
+
+# 页内切换：记下当前磨损度按钮文本，点击出租页签；找不到页签时通过前端路由(pushState+popstate)切换
+# 当前页面没有磨损度按钮时返回'none'（无法判断切换是否完成）
+SPA_SWITCH_JS = '''
+const btns = document.querySelectorAll('[class^="btn-box___"], [class*="btn-box"]');
+if (!btns.length) {
+    return 'none';
+}
+window.__youpinButtons = Array.from(btns, b => b.textContent).join('\\n');
+const names = arguments[0].split('|');
+const matches = Array.from(document.querySelectorAll('[role="tab"], [class*="tab"], a, button, li, span, div'))
+    .filter(el => names.includes((el.textContent || '').trim()));
+// 文字相同的嵌套元素中点击最内层的
+const target = matches.find(el => !matches.some(other => other !== el && el.contains(other)));
+if (target) {
+    target.click();
+    return 'click';
+}
+history.pushState(history.state, '', arguments[1]);
+window.dispatchEvent(new PopStateEvent('popstate', {state: history.state}));
+return 'router';
+'''
+
+# 页内切换状态：磨损度按钮文本与切换前不同 -> ready；按钮消失且显示“暂无”提示 -> empty；否则 -> loading
+SPA_STATE_JS = '''
+const btns = document.querySelectorAll('[class^="btn-box___"], [class*="btn-box"]');
+if (btns.length) {
+    return Array.from(btns, b => b.textContent).join('\\n') !== window.__youpinButtons ? 'ready' : 'loading';
+}
+const text = document.body ? document.body.innerText : '';
+for (const marker of arguments[0].split('|')) {
+    if (marker && text.includes(marker)) {
+        return 'empty';
+    }
+}
+return 'loading';
+'''
+
+
 class YoupinScraper:
     """悠悠有品爬虫类"""
     
-    def __init__(self, use_existing_browser: bool = None):
+    def __init__(self, use_existing_browser: bool = None, debug_port: int = None, user_data_dir: str = None):
         """
         初始化爬虫
         
@@ -45,13 +146,44 @@ class YoupinScraper:
                              None: 根据config.AUTO_START_CHROME自动决定
                              True: 连接现有浏览器
                              False: 自动启动新浏览器
+            debug_port: Chrome远程调试端口，默认使用config.CHROME_DEBUG_PORT
+            user_data_dir: Chrome用户数据目录，默认使用config.CHROME_USER_DATA_DIR
         """
         if use_existing_browser is None:
             use_existing_browser = not config.AUTO_START_CHROME
+        if debug_port is None:
+            debug_port = config.CHROME_DEBUG_PORT
+        if user_data_dir is None:
+            user_data_dir = config.CHROME_USER_DATA_DIR
         
+        self.debug_port = debug_port
+        self.user_data_dir = user_data_dir
         self.page = None
+        self.tabs = []  # 并发采集使用的标签页（第一个为self.page）
+        self.session_backend: Optional[SessionBackend] = None  # 轻量HTTP后端
+        self.rate_controller = AdaptiveRateController() if config.ADAPTIVE_RATE else None
+        self.journal: Optional[ProgressJournal] = None  # 断点续爬进度日志
+        self.writer: Optional[ResultWriter] = None  # 本次运行的结果文件
+        self.history: Optional[PriceHistoryStore] = None  # 价格历史库
+        self.columnar: Optional[ColumnarWriter] = None  # 列式输出
+        self.cache: Optional[PageCache] = None  # 页面结果缓存
+        # 本次运行最近访问页面的结果（LRU），同一templateId在多个商品中出现时只访问一次（None表示不去重）
+        self.page_results: Optional[OrderedDict] = None
+        self.skipped_rent_pages = 0  # 因售价页面无数据而省略的租价页面数
+        self.metrics: MetricsRegistry = default_registry  # 各阶段耗时和页面计数
+        self.blocker: Optional[RequestBlocker] = None  # 标签页请求屏蔽和流量统计
+        self.lease: Optional[SessionLease] = None  # 从会话服务租用的标签页
+        self.retry_queue: Optional[RetryQueue] = None  # 失败页面的延迟重试队列
+        self.pages_loaded = 0  # 本次运行加载的页面数（主流程中，不含本次运行内去重的页面和重试阶段的加载）
+        self.spa_failures = 0  # 连续页内切换失败次数
+        # 本次运行从进度日志或页面缓存取得的页面（价格不是本次采集的，不写入价格历史库）
+        self.stored_pages: Set[Tuple[str, int]] = set()
+        # 使用了这些页面的结果行：(商品名, 版本) -> (售价是否来自存储, 租价是否来自存储)
+        self.stale_rows: Dict[Tuple[str, str], Tuple[bool, bool]] = {}
+        # 没有价格但结果已确定的页面（暂无商品或重试次数用完），同样写入进度日志，续爬时不再访问
+        self.final_pages: Set[Tuple[str, int]] = set()
+        self._lock = threading.Lock()
         self.use_existing_browser = use_existing_browser
-        self.records: List[PriceRecord] = []
     
     def start_chrome(self) -> bool:
         """
@@ -64,28 +196,53 @@ class YoupinScraper:
             logger.info("正在启动Chrome浏览器...")
             
             # 确保用户数据目录存在
-            os.makedirs(config.CHROME_USER_DATA_DIR, exist_ok=True)
+            os.makedirs(self.user_data_dir, exist_ok=True)
             
             # 构建启动命令
             cmd = [
                 config.CHROME_PATH,
-                f"--remote-debugging-port={config.CHROME_DEBUG_PORT}",
-                f"--user-data-dir={config.CHROME_USER_DATA_DIR}"
+                f"--remote-debugging-port={self.debug_port}",
+                f"--user-data-dir={self.user_data_dir}"
             ]
             
             # 启动Chrome（不等待窗口关闭）
             subprocess.Popen(cmd, shell=True)
             
-            # 等待Chrome启动
+            # 等待调试端口就绪
             logger.info("等待Chrome启动...")
-            time.sleep(3)
+            if not self.wait_for_debugger(config.CHROME_START_TIMEOUT):
+                logger.error(f"Chrome在 {config.CHROME_START_TIMEOUT} 秒内未就绪 (端口: {self.debug_port})")
+                return False
             
-            logger.info(f"Chrome已启动 (端口: {config.CHROME_DEBUG_PORT})")
+            logger.info(f"Chrome已启动 (端口: {self.debug_port})")
             return True
         except Exception as e:
             logger.error(f"启动Chrome失败: {e}")
             return False
     
+    def wait_for_debugger(self, timeout: float) -> bool:
+        """
+        轮询DevTools的/json/version接口，直到浏览器调试端口可用
+        
+        Args:
+            timeout: 最长等待时间（秒）
+        
+        Returns:
+            调试端口是否可用
+        """
+        url = f"http://127.0.0.1:{self.debug_port}/json/version"
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return True
+            except Exception:
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(config.READY_POLL_INTERVAL)
+    
     def connect(self) -> bool:
         """
         连接到浏览器
@@ -98,24 +255,24 @@ class YoupinScraper:
             max_retries = 3
             for retry in range(max_retries):
                 try:
-                    logger.info(f"尝试连接现有浏览器 (端口: {config.CHROME_DEBUG_PORT}, 重试: {retry+1}/{max_retries})")
+                    logger.info(f"尝试连接现有浏览器 (端口: {self.debug_port}, 重试: {retry+1}/{max_retries})")
                     
                     # 使用ChromiumOptions来指定端口，然后创建ChromiumPage
                     co = ChromiumOptions()
-                    co.set_local_port(config.CHROME_DEBUG_PORT)
+                    co.set_local_port(self.debug_port)
                     self.page = ChromiumPage(co)
-                    logger.info(f"成功接管已有浏览器 (端口: {config.CHROME_DEBUG_PORT})")
+                    logger.info(f"成功接管已有浏览器 (端口: {self.debug_port})")
                     return True
                 except Exception as e:
                     logger.error(f"连接现有浏览器失败: {e}")
                     if retry < max_retries - 1:
-                        logger.info(f"{2}秒后重试...")
-                        time.sleep(2)
+                        logger.info("等待调试端口就绪后重试...")
+                        self.wait_for_debugger(config.CHROME_RETRY_TIMEOUT)
                     else:
                         logger.error("已达到最大重试次数，无法连接现有浏览器")
                         logger.error("=" * 60)
                         logger.error("请确保已正确启动Chrome并带有调试端口和用户数据目录:")
-                        logger.error(f'  chrome.exe --remote-debugging-port={config.CHROME_DEBUG_PORT} --user-data-dir="{config.CHROME_USER_DATA_DIR}"')
+                        logger.error(f'  chrome.exe --remote-debugging-port={self.debug_port} --user-data-dir="{self.user_data_dir}"')
                         logger.error("=" * 60)
                         logger.error("注意:")
                         logger.error("1. 必须添加 --user-data-dir 参数，否则DrissionPage无法正确连接")
@@ -131,12 +288,11 @@ class YoupinScraper:
                 if self.start_chrome():
                     # 启动成功后尝试连接
                     logger.info("Chrome已启动，正在连接...")
-                    time.sleep(2)
                     try:
                         co = ChromiumOptions()
-                        co.set_local_port(config.CHROME_DEBUG_PORT)
+                        co.set_local_port(self.debug_port)
                         self.page = ChromiumPage(co)
-                        logger.info(f"成功接管自动启动的浏览器 (端口: {config.CHROME_DEBUG_PORT})")
+                        logger.info(f"成功接管自动启动的浏览器 (端口: {self.debug_port})")
                         return True
                     except Exception as e:
                         logger.error(f"连接自动启动的浏览器失败: {e}")
@@ -149,60 +305,467 @@ class YoupinScraper:
                 logger.error("请在config.py中设置 AUTO_START_CHROME = True")
                 return False
     
+    def lease_from_service(self, count: int = None) -> bool:
+        """
+        从常驻会话服务租用已预热的标签页（代替connect）
+        
+        Args:
+            count: 标签页数量，默认使用config.TAB_COUNT
+        
+        Returns:
+            是否租用成功（服务未运行或没有空闲标签页时返回False）
+        """
+        self.lease = lease_tabs(config.TAB_COUNT if count is None else count)
+        if self.lease is None:
+            return False
+        self.page = self.lease.tabs[0]
+        self.debug_port = self.lease.debug_port
+        return True
+    
+    def open_tabs(self, count: int = None) -> int:
+        """
+        打开并发采集用的标签页
+        
+        Args:
+            count: 标签页数量，默认使用config.TAB_COUNT（使用租用的标签页时忽略）
+        
+        Returns:
+            实际可用的标签页数量
+        """
+        if count is None:
+            count = config.TAB_COUNT
+        
+        if self.lease is not None:
+            self.tabs = list(self.lease.tabs)
+        else:
+            self.tabs = [self.page]
+            for _ in range(max(count, 1) - 1):
+                try:
+                    self.tabs.append(self.page.new_tab())
+                except Exception as e:
+                    logger.error(f"打开新标签页失败: {e}")
+                    break
+        
+        # 屏蔽图片、字体、媒体和统计脚本，统计流量
+        if self.blocker is not None:
+            for tab in self.tabs:
+                self.blocker.attach(tab)
+        
+        # 每个标签页按RATE_*的速率访问，共享的令牌桶总速率随标签页数放大
+        if self.rate_controller is not None:
+            self.rate_controller.set_workers(len(self.tabs))
+        
+        logger.info(f"已准备 {len(self.tabs)} 个标签页用于采集")
+        return len(self.tabs)
+    
+    def close_tabs(self):
+        """关闭额外打开的标签页，保留self.page（租用的标签页不关闭，归还给会话服务）"""
+        if self.lease is not None:
+            self.lease.release()
+            self.lease = None
+            self.tabs = []
+            return
+        for tab in self.tabs[1:]:
+            try:
+                tab.close()
+            except Exception as e:
+                logger.debug(f"关闭标签页时出错: {e}")
+        self.tabs = [self.page] if self.page else []
+    
     def random_delay(self, min_sec: float = None, max_sec: float = None):
-        """随机延迟，模拟人工操作"""
+        """随机延迟，模拟人工操作（启用自适应限速且未指定范围时由速率控制器决定等待时间）"""
+        with self.metrics.timer('delay'):
+            delay = self.next_delay(min_sec, max_sec)
+            if delay > 0:
+                logger.debug(f"等待 {delay:.2f} 秒...")
+                time.sleep(delay)
+    
+    def next_delay(self, min_sec: float = None, max_sec: float = None) -> float:
+        """
+        计算下一次请求前需要等待的时间（不等待，供random_delay和异步引擎使用）
+        
+        Returns:
+            等待秒数
+        """
+        if self.rate_controller is not None and min_sec is None and max_sec is None:
+            return self.rate_controller.reserve()
+        
         if min_sec is None:
             min_sec = config.MIN_DELAY
         if max_sec is None:
             max_sec = config.MAX_DELAY
+        return random.uniform(min_sec, max_sec)
+    
+    def fetch_prices(self, template_id: str, list_type: int, tab=None) -> Dict[str, Optional[float]]:
+        """
+        获取页面价格并控制访问节奏
+        
+        进度日志或页面缓存中已有的页面直接返回，不访问页面也不延迟；
+        新采集到价格的页面写入进度日志和页面缓存。
+        
+        Args:
+            template_id: 商品模板ID
+            list_type: 页面类型（10=售价，30=租价）
+            tab: 使用的标签页，默认使用self.page
+        
+        Returns:
+            {磨损度: 价格} 字典
+        """
+        key = (template_id, list_type)
+        if self.page_results is not None:
+            with self._lock:
+                prices = self.page_results.get(key)
+                if prices is not None:
+                    self.page_results.move_to_end(key)
+            if prices is not None:
+                logger.debug(f"本次运行已采集过: templateId={template_id}, listType={list_type}")
+                self.metrics.inc('dedup_hits')
+                return prices
         
-        delay = random.uniform(min_sec, max_sec)
-        logger.debug(f"等待 {delay:.2f} 秒...")
-        time.sleep(delay)
+        prices = self._load_prices(template_id, list_type, tab)
+        with self._lock:
+            self.pages_loaded += 1
+        if self.page_results is not None:
+            with self._lock:
+                self.page_results[key] = prices
+                if len(self.page_results) > config.PAGE_RESULTS_MAX:
+                    self.page_results.popitem(last=False)
+        return prices
     
-    def get_prices_from_page(self, template_id: str, list_type: int) -> Dict[str, Optional[float]]:
+    def _load_prices(self, template_id: str, list_type: int, tab=None) -> Dict[str, Optional[float]]:
+        """依次从进度日志、页面缓存、页面获取价格"""
+        prices = self._stored_prices(template_id, list_type)
+        if prices is not None:
+            return prices
+        
+        prices = self.get_prices_from_page(template_id, list_type, tab)
+        self.random_delay()  # 请求后延迟，避免访问过快
+        self._remember_prices(template_id, list_type, prices)
+        return prices
+    
+    def _stored_prices(self, template_id: str, list_type: int) -> Optional[Dict[str, Optional[float]]]:
+        """从进度日志或页面缓存取价格，都没有时返回None"""
+        if self.journal is not None:
+            prices = self.journal.get(template_id, list_type)
+            if prices is not None:
+                logger.info(f"从进度日志恢复: templateId={template_id}, listType={list_type}")
+                self.metrics.inc('journal_hits')
+                with self._lock:
+                    self.stored_pages.add((template_id, list_type))
+                return prices
+        
+        if self.cache is not None:
+            prices = self.cache.get(template_id, list_type)
+            if prices is not None:
+                logger.info(f"命中页面缓存: templateId={template_id}, listType={list_type}")
+                self.metrics.inc('cache_hits')
+                if self.journal is not None:
+                    self.journal.record(template_id, list_type, prices)
+                with self._lock:
+                    self.stored_pages.add((template_id, list_type))
+                return prices
+        
+        return None
+    
+    def _remember_prices(self, template_id: str, list_type: int, prices: Dict[str, Optional[float]]):
+        """采集到价格的页面写入进度日志和页面缓存，结果已确定的空页面只写入进度日志"""
+        with self._lock:
+            final = (template_id, list_type) in self.final_pages
+            self.final_pages.discard((template_id, list_type))
+        found = any(v is not None for v in prices.values())
+        if (found or final) and self.journal is not None:
+            self.journal.record(template_id, list_type, prices)
+        if found and self.cache is not None:
+            try:
+                self.cache.put(template_id, list_type, prices)
+            except Exception as e:
+                # 缓存写入失败不影响本次采集结果
+                logger.warning(f"写入页面缓存失败: templateId={template_id}, listType={list_type}: {e}")
+    
+    def get_prices_from_page(self, template_id: str, list_type: int, tab=None) -> Dict[str, Optional[float]]:
         """
         从页面获取各磨损度的价格（不重试，失败直接返回）
         
         Args:
             template_id: 商品模板ID
             list_type: 页面类型（10=售价，30=租价）
+            tab: 使用的标签页，默认使用self.page
         
         Returns:
             {磨损度: 价格} 字典
         """
+        if self.session_backend is not None:
+            with self.metrics.timer('session_fetch'):
+                prices = self.session_backend.get_prices_from_page(template_id, list_type)
+            if any(v is not None for v in prices.values()):
+                logger.info(f"通过HTTP后端获取价格: templateId={template_id}, listType={list_type}")
+                self._report_page(True)
+                return prices
+            logger.debug("HTTP后端未获取到价格，回退到浏览器")
+        
+        tab = tab or self.page
         url = build_url(template_id, list_type)
         prices = {wear: None for wear in config.WEAR_LEVELS.keys()}
         
         try:
             logger.info(f"访问页面: {url}")
-            self.page.get(url)
-            
-            # 等待价格元素出现
-            self._wait_for_content()
-            
-            # 解析价格
-            prices = self._parse_prices_from_page()
-            
-            if any(v is not None for v in prices.values()):
-                logger.info(f"成功获取价格")
+            if config.USE_NETWORK_CAPTURE:
+                prices = self._get_prices_from_response(tab, url, list_type)
             else:
-                logger.warning(f"未找到价格数据，跳过")
+                # 等待价格元素出现（页面显示暂无商品时不再解析）
+                if self._open_page(tab, template_id, list_type, url) == 'empty':
+                    self._report_no_listings(template_id, list_type)
+                    return prices
                 
+                # 解析价格
+                prices = self._parse_prices_from_page(tab)
+            
+            self._check_prices(template_id, list_type, prices)
+        
         except Exception as e:
-            logger.error(f"获取价格失败: {e}，跳过")
+            self._page_error(template_id, list_type, e)
         
         return prices
     
-    def _wait_for_content(self):
-        """等待页面内容加载"""
+    def _open_page(self, tab, template_id: str, list_type: int, url: str) -> str:
+        """
+        打开页面并等待内容就绪（租价页面优先在已打开的售价页面内切换，失败时整页加载）
+        
+        Returns:
+            _wait_for_content的结果
+        """
+        if not (list_type == config.LIST_TYPE_RENT and self._switch_to_rent(tab, template_id, url)):
+            with self.metrics.timer('navigate'):
+                tab.get(url)
+        return self._wait_for_content(tab)
+    
+    def _report_no_listings(self, template_id: str, list_type: int):
+        """页面显示暂无商品（正常的空页面，不重试，续爬时也不再访问）"""
+        logger.info("页面暂无商品，跳过")
+        self._report_page(True, 'no_listings')
+        with self._lock:
+            self.final_pages.add((template_id, list_type))
+    
+    def _check_prices(self, template_id: str, list_type: int, prices: Dict[str, Optional[float]]):
+        """根据解析结果记录页面成功，没有价格时记为空页面并放入重试队列"""
+        if any(v is not None for v in prices.values()):
+            logger.info(f"成功获取价格")
+            self._report_page(True)
+        else:
+            logger.warning(f"未找到价格数据，跳过")
+            self._report_page(False, 'empty')
+            self._defer(template_id, list_type, 'empty')
+    
+    def _page_error(self, template_id: str, list_type: int, error: Exception):
+        """记录页面超时或出错，并放入重试队列"""
+        logger.error(f"获取价格失败: {error}，跳过")
+        reason = 'timeout' if 'timeout' in type(error).__name__.lower() else 'error'
+        self._report_page(False, reason)
+        self._defer(template_id, list_type, reason)
+    
+    def _switch_to_rent(self, tab, template_id: str, url: str) -> bool:
+        """
+        在同一templateId的售价页面内切换到租价列表，只等待磨损度按钮更新
+        
+        Args:
+            tab: 使用的标签页
+            template_id: 商品模板ID
+            url: 租价页面URL（前端路由切换时使用）
+        
+        Returns:
+            是否切换成功（False时由调用方整页加载）
+        """
+        if not config.SPA_TAB_SWITCH or self.spa_failures >= config.SPA_MAX_FAILURES:
+            return False
         try:
-            # 等待磨损度按钮出现（btn-box___ 开头的class）
-            self.page.wait.ele_displayed('css:[class^="btn-box___"]', timeout=5)
-        except Exception as e:
-            logger.debug(f"等待超时，继续解析: {e}")
+            query = parse_qs(urlparse(tab.url).query)
+        except Exception:
+            return False
+        if query.get('templateId') != [template_id] or query.get('listType') != [str(config.LIST_TYPE_SELL)]:
+            return False
+        
+        markers = '|'.join(config.EMPTY_PAGE_TEXTS)
+        with self.metrics.timer('spa_switch'):
+            try:
+                method = tab.run_js(SPA_SWITCH_JS, '|'.join(config.SPA_RENT_TAB_TEXTS), url)
+                state = 'loading'
+                if method != 'none':
+                    deadline = time.monotonic() + config.SPA_SWITCH_TIMEOUT
+                    state = tab.run_js(SPA_STATE_JS, markers)
+                    while state == 'loading' and time.monotonic() < deadline:
+                        time.sleep(config.READY_POLL_INTERVAL)
+                        state = tab.run_js(SPA_STATE_JS, markers)
+            except Exception as e:
+                logger.debug(f"页内切换出错: {e}")
+                method, state = 'error', 'loading'
+        
+        if state in ('ready', 'empty'):
+            logger.debug(f"页内切换到租价列表 ({method})")
+            with self._lock:
+                self.spa_failures = 0
+            self.metrics.inc('spa_switches')
+            return True
+        
+        with self._lock:
+            self.spa_failures += 1
+            failures = self.spa_failures
+        self.metrics.inc('spa_fallbacks')
+        logger.info(f"页内切换失败 ({method})，整页加载租价页面")
+        if failures == config.SPA_MAX_FAILURES:
+            logger.warning(f"页内切换连续失败 {failures} 次，本次运行不再尝试")
+        return False
+    
+    def _defer(self, template_id: str, list_type: int, reason: str):
+        """将失败的页面放入延迟重试队列（未启用重试时忽略）"""
+        if self.retry_queue is not None and reason in config.RETRY_REASONS:
+            self.retry_queue.add(template_id, list_type, reason)
+            if (template_id, list_type) in self.retry_queue.exhausted:
+                with self._lock:
+                    self.final_pages.add((template_id, list_type))
+    
+    def _report_page(self, ok: bool, reason: str = ''):
+        """将页面结果计入指标并反馈给速率控制器（ok为True时reason可区分正常的空页面）"""
+        self.metrics.inc(f'pages_{reason}' if reason else 'pages_success')
+        if self.rate_controller is None:
+            return
+        if ok:
+            self.rate_controller.on_success()
+        else:
+            self.rate_controller.on_failure(reason)
+    
+    def _get_prices_from_response(self, tab, url: str, list_type: int) -> Dict[str, Optional[float]]:
+        """
+        网络响应捕获模式：监听页面发出的商品列表接口，直接从返回的JSON中读取价格
+        
+        页面导航不等待渲染（load_mode=none），逐个检查匹配的接口响应，解析出价格即返回；
+        CAPTURE_TIMEOUT秒内没有响应包含价格时回退到DOM解析。
+        
+        Args:
+            tab: 使用的标签页
+            url: 页面URL
+            list_type: 页面类型（10=售价，30=租价）
+        
+        Returns:
+            {磨损度: 价格} 字典
+        """
+        prices = None
+        tab.set.load_mode.none()
+        tab.listen.start(config.CAPTURE_TARGET)
+        try:
+            with self.metrics.timer('capture'):
+                tab.get(url)
+                # steps的超时从每个数据包到达时重新计算，另外限制总等待时间
+                deadline = time.monotonic() + config.CAPTURE_TIMEOUT
+                for packet in tab.listen.steps(timeout=config.CAPTURE_TIMEOUT):
+                    if packet.response is not None:
+                        found = self._parse_prices_from_json(packet.response.body, list_type)
+                        if any(v is not None for v in found.values()):
+                            logger.debug(f"从接口响应获取价格: {packet.url}")
+                            prices = found
+                            break
+                    if time.monotonic() >= deadline:
+                        break
+        finally:
+            tab.listen.stop()
+            # 恢复默认加载模式，之后的DOM模式加载和归还给会话服务的标签页不受影响
+            tab.set.load_mode.normal()
+        
+        if prices is not None:
+            return prices
+        
+        logger.debug("未捕获到价格接口响应，回退到页面解析")
+        self._wait_for_content(tab)
+        return self._parse_prices_from_page(tab)
+    
+    def _parse_prices_from_json(self, data, list_type: int) -> Dict[str, Optional[float]]:
+        """
+        从接口返回的JSON中解析各磨损度价格
+        
+        遍历JSON中所有对象，磨损度字段（config.CAPTURE_WEAR_KEYS）包含磨损度名称的，
+        取第一个存在的价格字段（售价页面用config.CAPTURE_SELL_PRICE_KEYS，租价页面用config.CAPTURE_RENT_PRICE_KEYS）；
+        同一磨损度取最低价，与页面按钮上显示的价格一致。
+        
+        Args:
+            data: 响应体（已解析的JSON）
+            list_type: 页面类型（10=售价，30=租价）
+        
+        Returns:
+            {磨损度: 价格} 字典
+        """
+        prices = {wear: None for wear in config.WEAR_LEVELS.keys()}
+        price_keys = config.CAPTURE_RENT_PRICE_KEYS if list_type == config.LIST_TYPE_RENT \
+            else config.CAPTURE_SELL_PRICE_KEYS
+        stack = [data]
+        
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
+            
+            wear_name = self._match_wear_name(node)
+            if wear_name:
+                for key in price_keys:
+                    if node.get(key) is None:
+                        continue
+                    price = parse_price(str(node[key]))
+                    if price is not None:
+                        if prices[wear_name] is None or price < prices[wear_name]:
+                            prices[wear_name] = price
+                        break
+            
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        
+        return prices
+    
+    @staticmethod
+    def _match_wear_name(node: dict) -> Optional[str]:
+        """返回JSON对象磨损度字段对应的磨损度名称（跳过StatTrak）"""
+        for key in config.CAPTURE_WEAR_KEYS:
+            value = node.get(key)
+            if not isinstance(value, str) or 'StatTrak' in value or '★' in value:
+                continue
+            for wear_name, wear_en in config.WEAR_LEVELS.items():
+                if wear_name in value or wear_en in value:
+                    return wear_name
+        return None
     
-    def _parse_prices_from_page(self) -> Dict[str, Optional[float]]:
+    def _wait_for_content(self, tab=None) -> str:
+        """
+        等待页面内容就绪
+        
+        轮询页面状态，磨损度按钮出现、页面显示“暂无”提示、或页面加载完成且网络空闲时立即返回，
+        最长等待config.CONTENT_TIMEOUT秒。网络空闲要求最近没有请求完成、且没有进行中的请求
+        （由RequestBlocker的Network事件统计；标签页未启用统计时不以空闲结束等待）。
+        
+        Args:
+            tab: 使用的标签页，默认使用self.page
+        
+        Returns:
+            'ready'（有按钮）、'empty'（暂无商品）、'idle'（加载完成但没有按钮）或'timeout'
+        """
+        tab = tab or self.page
+        markers = '|'.join(config.EMPTY_PAGE_TEXTS)
+        deadline = time.monotonic() + config.CONTENT_TIMEOUT
+        with self.metrics.timer('wait_content'):
+            while True:
+                try:
+                    state = tab.run_js(PAGE_STATE_JS, markers, config.NETWORK_IDLE_MS)
+                except Exception as e:
+                    logger.debug(f"读取页面状态失败: {e}")
+                    state = 'loading'
+                if state in ('ready', 'empty'):
+                    return state
+                if state == 'idle' and self.blocker is not None and self.blocker.pending(tab) == 0:
+                    return state
+                if time.monotonic() >= deadline:
+                    logger.debug("等待页面内容超时，继续解析")
+                    return 'timeout'
+                time.sleep(config.READY_POLL_INTERVAL)
+    
+    def _parse_prices_from_page(self, tab=None) -> Dict[str, Optional[float]]:
         """
         从当前页面解析价格
         
@@ -213,89 +776,65 @@ class YoupinScraper:
         售价页面格式：崭新出厂¥2329
         租价页面格式：崭新出厂¥0.60/天
         """
+        tab = tab or self.page
         prices = {wear: None for wear in config.WEAR_LEVELS.keys()}
         
         try:
-            # 查找所有磨损度按钮（class以btn-box___开头）
-            btn_elements = self.page.eles('css:[class^="btn-box___"]')
-            
-            if not btn_elements:
-                # 备用选择器
-                btn_elements = self.page.eles('css:[class*="btn-box"]')
-            
-            logger.debug(f"找到 {len(btn_elements)} 个按钮元素")
-            
-            for btn in btn_elements:
-                try:
-                    # 获取按钮的完整文本
-                    btn_text = btn.text.strip()
-                    
-                    if not btn_text:
-                        continue
-                    
-                    # 跳过StatTrak切换按钮（包含"★ StatTrak"）
-                    if 'StatTrak' in btn_text or '★' in btn_text:
-                        logger.debug(f"跳过StatTrak按钮: {btn_text}")
-                        continue
-                    
-                    # 检查是否包含磨损度名称
-                    for wear_name in config.WEAR_LEVELS.keys():
-                        if wear_name in btn_text:
-                            # 提取价格
-                            # 格式可能是：崭新出厂¥2329 或 崭新出厂¥0.60/天
-                            price = self._extract_price_from_text(btn_text)
-                            if price is not None:
-                                prices[wear_name] = price
-                                logger.debug(f"解析到 {wear_name}: {price}")
-                            break
-                            
-                except Exception as e:
-                    logger.debug(f"解析按钮时出错: {e}")
-                    continue
-            
+            with self.metrics.timer('parse'):
+                # 一次脚本调用取回所有按钮文本（class以btn-box___开头，找不到时用备用选择器）
+                btn_texts = tab.run_js(BUTTON_TEXTS_JS) or []
+                
+                logger.debug(f"找到 {len(btn_texts)} 个按钮元素")
+                
+                prices = self._prices_from_button_texts(btn_texts)
+        
         except Exception as e:
             logger.error(f"解析价格时出错: {e}")
         
         return prices
     
-    def _extract_price_from_text(self, text: str) -> Optional[float]:
+    def _prices_from_button_texts(self, btn_texts: List[str]) -> Dict[str, Optional[float]]:
         """
-        从按钮文本中提取价格
-        
-        支持格式：
-        - 崭新出厂¥2329
-        - 崭新出厂¥0.60/天
-        - 略有磨损¥787.5
+        从磨损度按钮文本列表中解析价格
         
         Args:
-            text: 按钮文本
+            btn_texts: 按钮文本列表
         
         Returns:
-            价格数值
+            {磨损度: 价格} 字典
         """
-        if not text:
-            return None
-        
-        # 使用正则表达式提取¥后面的数字
-        # 匹配 ¥ 或 ￥ 后面的数字（可能包含逗号和小数点）
-        patterns = [
-            r'[¥￥]\s*([\d,]+\.?\d*)',  # 匹配 ¥2329 或 ¥0.60
-            r'([\d,]+\.?\d*)\s*/天',     # 匹配 0.60/天
-            r'([\d,]+\.?\d*)\s*元',      # 匹配 2329元
-        ]
+        prices = {wear: None for wear in config.WEAR_LEVELS.keys()}
         
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                price_str = match.group(1).replace(',', '')
-                try:
-                    return float(price_str)
-                except ValueError:
-                    continue
+        for btn_text in btn_texts:
+            btn_text = btn_text.strip()
+            
+            if not btn_text:
+                continue
+            
+            # 跳过StatTrak切换按钮（包含"★ StatTrak"）
+            if 'StatTrak' in btn_text or '★' in btn_text:
+                logger.debug(f"跳过StatTrak按钮: {btn_text}")
+                continue
+            
+            # 一次匹配磨损度名称和价格
+            # 格式可能是：崭新出厂¥2329 或 崭新出厂¥0.60/天
+            match = WEAR_PRICE_PATTERN.search(btn_text)
+            if not match:
+                continue
+            
+            price_str = match.group('yuan') or match.group('day') or match.group('unit')
+            try:
+                price = float(price_str.replace(',', ''))
+            except ValueError:
+                continue
+            
+            wear_name = match.group('wear')
+            prices[wear_name] = price
+            logger.debug(f"解析到 {wear_name}: {price}")
         
-        return None
+        return prices
     
-    def scrape_item(self, item: Item) -> List[PriceRecord]:
+    def scrape_item(self, item: Item) -> RecordBatch:
         """
         爬取单个商品的所有价格数据
         
@@ -303,108 +842,569 @@ class YoupinScraper:
             item: 商品对象
         
         Returns:
-            PriceRecord列表
+            RecordBatch记录批
         """
-        records = []
+        records = RecordBatch()
+        
+        for version_name, template_id in self._item_versions(item):
+            logger.info(f"正在采集: {item.name} ({version_name}版)")
+            
+            # 获取售价
+            sell_prices = self.fetch_prices(template_id, config.LIST_TYPE_SELL)
+            
+            # 获取租价（售价页面没有任何磨损度时省略）
+            if self._should_fetch_rent(sell_prices):
+                rent_prices = self.fetch_prices(template_id, config.LIST_TYPE_RENT)
+            else:
+                rent_prices = {}
+            
+            # 创建记录
+            self._build_records(records, item.name, version_name, sell_prices, rent_prices)
+            self._register_row(template_id, item.name, version_name)
+        
+        return records
+    
+    def scrape_items_parallel(self, items: List[Item]) -> RecordBatch:
+        """
+        使用多个标签页并发爬取一批商品
+        
+        所有templateId的售价页面放入共享队列，每个标签页一个工作线程，
+        各自取任务、各自延迟；售价页面完成后再把对应的租价页面放入队列
+        （售价页面没有数据时省略），全部完成后按商品组装成记录批。
+        
+        Args:
+            items: 商品对象列表
+        
+        Returns:
+            RecordBatch记录批（顺序与items一致）
+        """
+        jobs = queue.Queue()
+        pending = [0]  # 已入队或正在处理的任务数
+        pending_lock = threading.Lock()
+        
+        def put_job(template_id, list_type):
+            with pending_lock:
+                pending[0] += 1
+            jobs.put((template_id, list_type))
+        
+        queued = set()
+        for item in items:
+            for _, template_id in self._item_versions(item):
+                if template_id not in queued:
+                    queued.add(template_id)
+                    put_job(template_id, config.LIST_TYPE_SELL)
+        
+        results: Dict[Tuple[str, int], Dict[str, Optional[float]]] = {}
+        
+        def worker(tab):
+            while True:
+                try:
+                    template_id, list_type = jobs.get(timeout=0.1)
+                except queue.Empty:
+                    # 其他线程可能还会追加租价页面，全部完成后才退出
+                    with pending_lock:
+                        if pending[0] == 0:
+                            return
+                    continue
+                
+                try:
+                    # 每个标签页独立延迟
+                    prices = self.fetch_prices(template_id, list_type, tab)
+                    results[(template_id, list_type)] = prices
+                    if list_type == config.LIST_TYPE_SELL and self._should_fetch_rent(prices):
+                        if config.SPA_TAB_SWITCH:
+                            # 在同一标签页内切换到租价列表
+                            rent_key = (template_id, config.LIST_TYPE_RENT)
+                            results[rent_key] = self.fetch_prices(template_id, config.LIST_TYPE_RENT, tab)
+                        else:
+                            put_job(template_id, config.LIST_TYPE_RENT)
+                except Exception as e:
+                    # 出错的页面记为没有价格，线程继续处理其他任务
+                    logger.error(f"采集页面时出错: templateId={template_id}, listType={list_type}: {e}")
+                    results.setdefault((template_id, list_type), {wear: None for wear in config.WEAR_LEVELS.keys()})
+                finally:
+                    # 无论成功与否都要计数，否则其他线程会一直等待
+                    with pending_lock:
+                        pending[0] -= 1
+        
+        tabs = self.tabs or [self.page]
+        threads = [threading.Thread(target=worker, args=(tab,), daemon=True) for tab in tabs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
         
+        # 按商品组装结果
+        records = RecordBatch()
+        empty = {wear: None for wear in config.WEAR_LEVELS.keys()}
+        for item in items:
+            for version_name, template_id in self._item_versions(item):
+                self._build_records(
+                    records, item.name, version_name,
+                    results.get((template_id, config.LIST_TYPE_SELL), empty),
+                    results.get((template_id, config.LIST_TYPE_RENT), empty)
+                )
+                self._register_row(template_id, item.name, version_name)
+        
+        return records
+    
+    def _register_row(self, template_id: str, item_name: str, version_name: str):
+        """
+        记录结果行使用的templateId：重试成功后据此修补结果文件；
+        价格来自进度日志或页面缓存时记下，写入价格历史库时排除这些不是本次采集的价格
+        """
+        if self.retry_queue is not None:
+            self.retry_queue.register(template_id, item_name, version_name)
+        stale = ((template_id, config.LIST_TYPE_SELL) in self.stored_pages,
+                 (template_id, config.LIST_TYPE_RENT) in self.stored_pages)
+        if stale[0] or stale[1]:
+            with self._lock:
+                self.stale_rows[(item_name, version_name)] = stale
+    
+    def _history_records(self, records: RecordBatch) -> RecordBatch:
+        """返回写入价格历史库的记录：去掉来自进度日志或页面缓存的价格（两者都去掉的行由add_records跳过）"""
+        if not self.stale_rows:
+            return records
+        fresh = RecordBatch()
+        for name, version, wear, sell, rent in records.rows():
+            stale = self.stale_rows.get((name, version))
+            if stale is not None:
+                sell = None if stale[0] else sell
+                rent = None if stale[1] else rent
+            fresh.append(name, version, wear, sell, rent)
+        return fresh
+    
+    def _should_fetch_rent(self, sell_prices: Dict[str, Optional[float]]) -> bool:
+        """售价页面没有任何磨损度时省略租价页面"""
+        if not config.SKIP_RENT_WITHOUT_SELL or any(v is not None for v in sell_prices.values()):
+            return True
+        with self._lock:
+            self.skipped_rent_pages += 1
+        logger.info("售价页面没有数据，跳过租价页面")
+        return False
+    
+    @staticmethod
+    def _item_versions(item: Item) -> List[Tuple[str, str]]:
+        """返回商品需要采集的(版本名, templateId)列表，跳过空ID"""
         # 处理普通版和暗金版
         versions = [
             ("普通", item.normal_id),
             ("暗金", item.dark_gold_id)
         ]
+        return [(name, template_id) for name, template_id in versions if template_id]
+    
+    def _build_records(self, records: RecordBatch, item_name: str, version_name: str,
+                       sell_prices: Dict[str, Optional[float]],
+                       rent_prices: Dict[str, Optional[float]]):
+        """根据售价和租价字典将各磨损度的记录追加到记录批"""
+        for wear_name in config.WEAR_LEVELS.keys():
+            sell_price = sell_prices.get(wear_name)
+            rent_price = rent_prices.get(wear_name)
+            records.append(item_name, version_name, wear_name, sell_price, rent_price)
+            
+            # 打印调试信息
+            if sell_price or rent_price:
+                logger.debug(f"  {wear_name}: 售价={sell_price}, 租价={rent_price}")
+    
+    def _retry_stage(self):
+        """
+        重试阶段：主流程结束后按到期顺序重试失败的页面
         
-        for version_name, template_id in versions:
-            if not template_id:
-                continue
+        重试仍失败的页面由get_prices_from_page重新放回队列（等待时间翻倍），直到重试次数用完；
+        售价页面重试成功后补采当初因售价无数据而省略的租价页面。
+        """
+        if not self.retry_queue:
+            return
+        logger.info(f"开始重试 {len(self.retry_queue)} 个失败页面")
+        
+        while True:
+            job = self.retry_queue.pop_due()
+            if job is None:
+                break
+            (template_id, list_type), wait = job
+            if wait > 0:
+                logger.info(f"等待 {wait:.1f} 秒后重试: templateId={template_id}, listType={list_type}")
+                time.sleep(wait)
             
-            logger.info(f"正在采集: {item.name} ({version_name}版)")
+            with self.metrics.timer('retry'):
+                prices = self._load_prices(template_id, list_type)
+            if not any(v is not None for v in prices.values()):
+                continue
+            self.retry_queue.resolve(template_id, list_type, prices)
+            self.metrics.inc('retry_recovered')
             
-            # 获取售价
-            sell_prices = self.get_prices_from_page(template_id, config.LIST_TYPE_SELL)
-            self.random_delay()  # 请求后延迟，避免访问过快
+            rent_key = (template_id, config.LIST_TYPE_RENT)
+            if list_type == config.LIST_TYPE_SELL and config.SKIP_RENT_WITHOUT_SELL \
+                    and rent_key not in self.retry_queue.failures:
+                # 与重试的页面一样不计入pages_loaded（覆盖率只按主流程的页面计算），但已不再是省略的页面
+                with self._lock:
+                    self.skipped_rent_pages -= 1
+                prices = self._load_prices(template_id, config.LIST_TYPE_RENT)
+                if any(v is not None for v in prices.values()):
+                    self.retry_queue.resolve(template_id, config.LIST_TYPE_RENT, prices)
+    
+    def _apply_retries(self, output_file: str):
+        """用重试成功的价格修补结果文件，并把修补后的记录写入价格历史库"""
+        if self.retry_queue is None or not self.retry_queue.resolved:
+            return
+        try:
+            patched = self.retry_queue.patch_results(output_file)
+            if len(patched) and self.history is not None:
+                self.history.add_records(self._history_records(patched))
+            if len(patched) and self.columnar is not None:
+                self.columnar.patch(patched)
+        except Exception as e:
+            logger.error(f"修补结果文件时出错: {e}")
+    
+    def _write_records(self, records: RecordBatch):
+        """将采集到的记录写入结果文件（和列式文件）、价格历史库"""
+        with self.metrics.timer('write'):
+            self.writer.write(records)
+            if self.columnar is not None:
+                self.columnar.write(records)
+        if self.history is not None:
+            with self.metrics.timer('history'):
+                self.history.add_records(self._history_records(records))
+    
+    def _read_stage(self, items_csv: str, plan: ScrapePlan, item_queue: queue.Queue):
+        """流水线读取阶段：逐行读取、规范化、去重商品，放入有界队列（队列满时阻塞）"""
+        try:
+            for item in iter_plan(iter_items_csv(items_csv), plan):
+                item_queue.put(item)
+        except Exception as e:
+            logger.error(f"读取商品列表失败: {e}")
+        finally:
+            item_queue.put(None)
+    
+    def _write_stage(self, record_queue: queue.Queue):
+        """流水线写入阶段：从有界队列取出记录写入结果文件和价格历史库"""
+        while True:
+            records = record_queue.get()
+            if records is None:
+                return
+            try:
+                self._write_records(records)
+            except Exception as e:
+                logger.error(f"写入结果时出错: {e}")
+    
+    def _scrape_stage(self, first_item: Item, item_queue: queue.Queue, record_queue: queue.Queue):
+        """流水线采集阶段：从商品队列取商品采集，结果放入记录队列"""
+        # 并发模式下每批提交的商品数量
+        BATCH_SIZE = 10
+        
+        item = first_item
+        count = 0
+        while item is not None:
+            if len(self.tabs) > 1:
+                batch = [item]
+                while len(batch) < BATCH_SIZE:
+                    item = item_queue.get()
+                    if item is None:
+                        break
+                    batch.append(item)
+                else:
+                    item = item_queue.get()
+                
+                logger.info(f"并发处理商品 [{count+1}-{count+len(batch)}]")
+                try:
+                    record_queue.put(self.scrape_items_parallel(batch))
+                except Exception as e:
+                    logger.error(f"并发处理商品 [{count+1}-{count+len(batch)}] 时出错: {e}")
+                count += len(batch)
+                continue
             
-            # 获取租价
-            rent_prices = self.get_prices_from_page(template_id, config.LIST_TYPE_RENT)
-            self.random_delay()  # 请求后延迟
+            count += 1
+            logger.info(f"处理商品 [{count}]: {item.name}")
+            try:
+                record_queue.put(self.scrape_item(item))
+            except Exception as e:
+                logger.error(f"处理商品 {item.name} 时出错: {e}")
             
-            # 创建记录
-            for wear_name in config.WEAR_LEVELS.keys():
-                record = PriceRecord(
-                    item_name=item.name,
-                    version=version_name,
-                    wear_level=wear_name,
-                    sell_price=sell_prices.get(wear_name),
-                    rent_price=rent_prices.get(wear_name)
-                )
-                records.append(record)
-                
-                # 打印调试信息
-                if record.sell_price or record.rent_price:
-                    logger.debug(f"  {wear_name}: 售价={record.sell_price}, 租价={record.rent_price}, 租售比={record.rent_ratio}")
-        
-        return records
+            # 商品之间的延迟已在scrape_item中处理，不需要额外延迟
+            item = item_queue.get()
     
-    def run(self, items_csv: str = None) -> str:
+    def run(self, items_csv: str = None, resume: bool = False,
+            output_file: str = None, checkpoint_file: str = None) -> str:
         """
         运行爬虫主流程
         
+        流水线：读取 -> 规范化/去重 -> 采集 -> 写入，各阶段之间用有界队列连接，
+        读到第一个商品即开始采集，内存占用与商品列表大小无关。
+        
         Args:
             items_csv: 输入CSV文件路径
+            resume: 是否从进度日志继续上次中断的采集
+            output_file: 输出文件路径，默认在config.OUTPUT_DIR下按时间生成
+            checkpoint_file: 进度日志路径，默认使用config.CHECKPOINT_FILE
         
         Returns:
             输出文件路径
         """
-        # 读取商品列表
-        items = read_items_csv(items_csv)
-        logger.info(f"读取到 {len(items)} 个商品")
+        # 读取阶段：后台逐行读取商品并生成采集计划（去重、剔除无效ID）
+        plan = ScrapePlan()
+        item_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        reader = threading.Thread(target=self._read_stage, args=(items_csv, plan, item_queue), daemon=True)
+        reader.start()
         
-        if not items:
+        first_item = item_queue.get()
+        if first_item is None:
             logger.error("没有找到商品数据")
             return ""
         
-        # 连接浏览器
-        if not self.connect():
+        if not self._start_run(resume, output_file, checkpoint_file):
+            return ""
+        
+        # 写入阶段：后台线程写文件，慢写入不阻塞页面访问
+        record_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        writer_thread = threading.Thread(target=self._write_stage, args=(record_queue,), daemon=True)
+        writer_thread.start()
+        
+        try:
+            self._scrape_stage(first_item, item_queue, record_queue)
+            self._retry_stage()
+        finally:
+            record_queue.put(None)
+            writer_thread.join()
+            self._close_run()
+        
+        return self._finish_run(plan)
+    
+    def _start_run(self, resume: bool = False, output_file: str = None, checkpoint_file: str = None,
+                   tab_count: int = None) -> bool:
+        """
+        准备一次运行：连接浏览器，打开进度日志、缓存、标签页、结果文件和价格历史库
+        
+        Args:
+            resume: 是否从进度日志继续上次中断的采集
+            output_file: 输出文件路径，默认在config.OUTPUT_DIR下按时间生成
+            checkpoint_file: 进度日志路径，默认使用config.CHECKPOINT_FILE
+            tab_count: 标签页数量，默认使用config.TAB_COUNT
+        
+        Returns:
+            是否成功（无法连接浏览器时返回False）
+        """
+        # 连接浏览器（会话服务运行时直接租用已预热的标签页）
+        leased = config.USE_SESSION_SERVICE and self.lease_from_service(tab_count)
+        if not leased and not self.connect():
             logger.error("无法连接到浏览器")
             if not config.AUTO_START_CHROME:
                 print("\n请先运行以下命令启动Chrome:")
-                print(f'  chrome.exe --remote-debugging-port={config.CHROME_DEBUG_PORT} --user-data-dir="{config.CHROME_USER_DATA_DIR}"')
+                print(f'  chrome.exe --remote-debugging-port={self.debug_port} --user-data-dir="{self.user_data_dir}"')
                 print("\n或者在config.py中设置 AUTO_START_CHROME = True 以自动启动Chrome")
-            return ""
+            return False
         
-        # 批量保存阈值
-        BATCH_SIZE = 10
-        output_file = ""
+        # 进度日志：续爬时跳过已完成的页面，否则重新开始
+        self.journal = ProgressJournal(checkpoint_file)
+        if resume:
+            done = self.journal.load()
+            logger.info(f"从进度日志恢复 {done} 个已完成页面: {self.journal.filepath}")
+        else:
+            self.journal.reset()
         
-        # 爬取每个商品
-        for i, item in enumerate(items):
-            logger.info(f"处理商品 [{i+1}/{len(items)}]: {item.name}")
-            
+        # 同一templateId在本次运行中只访问一次
+        self.page_results = OrderedDict()
+        self.skipped_rent_pages = 0
+        self.pages_loaded = 0
+        self.spa_failures = 0
+        self.stored_pages = set()
+        self.stale_rows = {}
+        self.final_pages = set()
+        self.metrics.reset()
+        
+        # 失败页面先跳过，主流程结束后再重试
+        self.retry_queue = RetryQueue() if config.RETRY_FAILED else None
+        
+        # 页面结果缓存
+        if config.USE_PAGE_CACHE:
+            self.cache = PageCache()
+        
+        # 轻量HTTP后端（复用浏览器cookies）
+        if config.USE_SESSION_BACKEND:
+            self.session_backend = SessionBackend(self)
+            self.session_backend.load_cookies(self.page)
+        
+        # 多标签页并发（每个标签页启用请求屏蔽）
+        self.blocker = RequestBlocker()
+        self.open_tabs(tab_count)
+        
+        # 整个运行只写一个输出文件，每个商品采集完立即追加
+        self.writer = ResultWriter(output_file=output_file)
+        logger.info(f"结果输出文件: {self.writer.output_file}")
+        self.columnar = None
+        if config.COLUMNAR_OUTPUT:
             try:
-                records = self.scrape_item(item)
-                self.records.extend(records)
+                self.columnar = ColumnarWriter(self.writer.output_file)
+                logger.info(f"列式输出文件: {self.columnar.output_file}")
+            except ImportError:
+                logger.warning("未安装pyarrow，跳过列式输出（pip install pyarrow）")
+        if config.SAVE_HISTORY:
+            self.history = PriceHistoryStore()
+        return True
+    
+    def _close_run(self):
+        """关闭结果文件（用重试结果修补后），释放标签页、进度日志、缓存和价格历史库"""
+        self.writer.close()
+        if self.columnar is not None:
+            try:
+                self.columnar.close()
             except Exception as e:
-                logger.error(f"处理商品 {item.name} 时出错: {e}")
-                continue
-            
-            # 批量保存
-            if (i + 1) % BATCH_SIZE == 0 or (i + 1) == len(items):
-                if self.records:
-                    output_file = save_results_csv(self.records)
-                    logger.info(f"已保存 {len(self.records)} 条记录到: {output_file}")
-                    # 清空记录列表，准备下一批
-                    self.records = []
-            
-            # 商品之间的延迟已在scrape_item中处理，不需要额外延迟
+                logger.error(f"写入列式文件时出错: {e}")
+        self._apply_retries(self.writer.output_file)
+        if self.history is not None:
+            self.history.close()
+        self.blocker.detach_all()
+        self.close_tabs()
+        self.journal.close()
+        if self.cache is not None:
+            self.cache.close()
+    
+    def _finish_run(self, plan: ScrapePlan) -> str:
+        """
+        输出本次运行的统计和指标
         
-        if not output_file:
+        Returns:
+            输出文件路径，没有采集到数据时删除空文件并返回空字符串
+        """
+        writer = self.writer
+        plan.log_summary()
+        if self.rate_controller is not None:
+            self.rate_controller.log_summary()
+        if self.cache is not None:
+            self.cache.log_summary()
+        logger.info(f"售价页面无数据省略的租价页面: {self.skipped_rent_pages} 个")
+        if self.retry_queue is not None:
+            self.retry_queue.log_summary(self.pages_loaded)
+            self.metrics.inc('retry_missing', len(self.retry_queue.missing()))
+        self.blocker.log_summary()
+        self.metrics.inc('net_requests', self.blocker.requests)
+        self.metrics.inc('net_blocked', self.blocker.blocked)
+        self.metrics.inc('net_bytes', self.blocker.bytes)
+        self.metrics.log_summary()
+        metrics_file = self.metrics.write_json(os.path.splitext(writer.output_file)[0] + '_metrics.json')
+        logger.info(f"运行指标已保存到: {metrics_file}")
+        
+        if not writer.count:
             logger.warning("没有采集到任何数据")
+            os.remove(writer.output_file)
+            if self.columnar is not None:
+                os.remove(self.columnar.output_file)
             return ""
         
-        return output_file
+        logger.info(f"已保存 {writer.count} 条记录到: {writer.output_file}")
+        if self.columnar is not None:
+            logger.info(f"列式文件: {self.columnar.output_file}")
+        if config.DELTA_OUTPUT:
+            try:
+                write_delta(writer.output_file)
+            except Exception as e:
+                logger.error(f"生成增量文件时出错: {e}")
+        return writer.output_file
+
+
+class SessionBackend:
+    """
+    轻量HTTP采集后端
+    
+    不启动浏览器，直接用requests长连接请求页面或接口，复用调试Chrome中的cookies。
+    与YoupinScraper.get_prices_from_page相同的调用约定，未获取到价格时由调用方回退到浏览器。
+    """
+    
+    def __init__(self, parser: YoupinScraper, pool_size: int = None):
+        """
+        初始化HTTP后端
+        
+        Args:
+            parser: 用于解析价格的爬虫对象（复用其按钮文本和JSON解析逻辑）
+            pool_size: 连接池大小，默认使用config.SESSION_POOL_SIZE
+        """
+        if pool_size is None:
+            pool_size = config.SESSION_POOL_SIZE
+        
+        self.parser = parser
+        self.session = Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # SessionPage保存了最近一次响应，多线程时每个线程各用一个，共享同一个Session
+        self._local = threading.local()
+    
+    def _get_page(self) -> SessionPage:
+        """返回当前线程的SessionPage（请求头从共享的Session复制，SessionPage不会继承Session的请求头）"""
+        page = getattr(self._local, 'page', None)
+        if page is None:
+            page = SessionPage(self.session)
+            page.set.headers(dict(self.session.headers))
+            self._local.page = page
+        return page
+    
+    def load_cookies(self, browser_page) -> int:
+        """
+        从浏览器导入cookies和User-Agent
+        
+        Args:
+            browser_page: 已连接的浏览器页面对象
+        
+        Returns:
+            导入的cookie数量
+        """
+        try:
+            cookies = browser_page.cookies(all_domains=True)
+            # User-Agent设置在共享的Session上，之后各线程新建的SessionPage都会复制
+            self.session.headers['User-Agent'] = browser_page.user_agent
+            page = self._get_page()
+            page.set.cookies(cookies)
+            page.set.header('User-Agent', browser_page.user_agent)
+            logger.info(f"已从浏览器导入 {len(cookies)} 个cookie")
+            return len(cookies)
+        except Exception as e:
+            logger.warning(f"导入浏览器cookies失败: {e}")
+            return 0
+    
+    def get_prices_from_page(self, template_id: str, list_type: int) -> Dict[str, Optional[float]]:
+        """
+        通过HTTP获取各磨损度的价格（不重试，失败直接返回）
+        
+        Args:
+            template_id: 商品模板ID
+            list_type: 页面类型（10=售价，30=租价）
+        
+        Returns:
+            {磨损度: 价格} 字典
+        """
+        prices = {wear: None for wear in config.WEAR_LEVELS.keys()}
+        
+        if config.SESSION_API_URL:
+            url = config.SESSION_API_URL.format(template_id=template_id, list_type=list_type,
+                                                game_id=config.GAME_ID)
+        else:
+            url = build_url(template_id, list_type)
+        
+        try:
+            page = self._get_page()
+            logger.debug(f"HTTP请求: {url}")
+            if not page.get(url, retry=0, timeout=config.PAGE_LOAD_TIMEOUT):
+                logger.debug(f"HTTP请求失败: {url}")
+                return prices
+            
+            data = page.json
+            if data is not None:
+                prices = self.parser._parse_prices_from_json(data, list_type)
+            else:
+                btn_elements = page.eles('css:[class*="btn-box"]')
+                prices = self.parser._prices_from_button_texts([btn.text for btn in btn_elements])
+        except Exception as e:
+            logger.debug(f"HTTP获取价格失败: {e}")
+        
+        return prices
 
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="CS2饰品价格爬虫 - 悠悠有品")
+    parser.add_argument("items_csv", nargs="?", default=None, help="输入CSV文件路径（默认使用config.INPUT_CSV）")
+    parser.add_argument("--resume", action="store_true", help="从进度日志继续上次中断的采集")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("CS2饰品价格爬虫 - 悠悠有品")
     print("=" * 60)
@@ -423,7 +1423,7 @@ def main():
     input("准备好后按回车键开始...")
     
     scraper = YoupinScraper()
-    output_file = scraper.run()
+    output_file = scraper.run(args.items_csv, resume=args.resume)
     
     if output_file:
         print(f"\n爬取完成! 结果保存在: {output_file}")
@@ -0,0 +1,295 @@
+"""
+常驻浏览器会话服务
+保持一个已登录、已预热的Chrome和若干预先打开的标签页，采集任务、页面结构分析工具和定时任务
+通过本地socket租用标签页，不必每次运行都启动Chrome、加载用户目录
+"""
+
+import json
+import logging
+import socket
+import socketserver
+import sys
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+from DrissionPage import Chromium, ChromiumOptions
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class SessionService:
+    """
+    会话服务
+    
+    协议：每个请求、响应都是一行JSON
+        {"op": "lease", "count": 2}     -> {"ok": true, "lease_id": "...", "debug_port": 9222, "tab_ids": [...]}
+        {"op": "release", "lease_id": "..."} -> {"ok": true}
+        {"op": "status"}                -> {"ok": true, "free": 3, "leased": 1, "debug_port": 9222}
+    客户端连接断开时自动收回该连接租用的所有标签页（运行崩溃也不会占用标签页）。
+    """
+    
+    def __init__(self, tab_count: int = None, port: int = None):
+        """
+        Args:
+            tab_count: 预先打开的标签页数量，默认使用config.SESSION_SERVICE_TABS
+            port: 监听端口，默认使用config.SESSION_SERVICE_PORT
+        """
+        self.tab_count = config.SESSION_SERVICE_TABS if tab_count is None else tab_count
+        self.port = config.SESSION_SERVICE_PORT if port is None else port
+        self.scraper = None
+        self.browser = None
+        self.free: List[str] = []  # 空闲标签页ID
+        self.leases: Dict[str, List[str]] = {}  # lease_id -> 标签页ID
+        self._warming = 0  # 正在打开和预热（尚未加入空闲列表）的标签页数
+        self._lock = threading.Lock()
+        self._server = None
+    
+    def start(self) -> bool:
+        """
+        连接（或启动）浏览器并预热标签页
+        
+        Returns:
+            是否成功
+        """
+        # 复用爬虫的启动/接管逻辑；延迟导入避免与scraper循环引用
+        from scraper import YoupinScraper
+        
+        self.scraper = YoupinScraper()
+        if not self.scraper.connect():
+            return False
+        self.browser = self.scraper.page.browser
+        self._fill_pool()
+        logger.info(f"会话服务已预热 {len(self.free)} 个标签页 (浏览器端口: {self.scraper.debug_port})")
+        return True
+    
+    def _fill_pool(self):
+        """
+        移除已被关闭的标签页，补足标签页数量
+        
+        新标签页的打开和预热在锁外进行（每个最多PAGE_LOAD_TIMEOUT秒），期间其他客户端的租用、归还和状态查询不受影响。
+        """
+        with self._lock:
+            known = set(self.free)
+        alive = set(self.browser.tab_ids)
+        with self._lock:
+            # 只移除查询前就在池中的标签页，查询期间其他线程新加入的保留
+            self.free = [tab_id for tab_id in self.free if tab_id in alive or tab_id not in known]
+            leased = sum(len(ids) for ids in self.leases.values())
+            needed = self.tab_count - len(self.free) - leased - self._warming
+            if needed <= 0:
+                return
+            self._warming += needed
+        
+        try:
+            while needed > 0:
+                tab = self.browser.new_tab()
+                try:
+                    # 预热：加载一次商品列表页，建立连接、填充HTTP缓存和cookies
+                    tab.get(config.BASE_URL, timeout=config.PAGE_LOAD_TIMEOUT)
+                except Exception as e:
+                    logger.debug(f"预热标签页失败: {e}")
+                with self._lock:
+                    self.free.append(tab.tab_id)
+                    self._warming -= 1
+                needed -= 1
+        finally:
+            with self._lock:
+                self._warming -= needed
+    
+    def lease(self, count: int) -> Optional[Dict]:
+        """租用最多count个空闲标签页，没有空闲标签页时返回None"""
+        try:
+            self._fill_pool()
+        except Exception as e:
+            # 浏览器可能已关闭，重新连接后再试
+            logger.warning(f"浏览器不可用，重新连接: {e}")
+            if not self.scraper.connect():
+                return None
+            with self._lock:
+                self.browser = self.scraper.page.browser
+                self.free = []
+                self.leases = {}
+            self._fill_pool()
+        
+        with self._lock:
+            if not self.free:
+                return None
+            tab_ids = self.free[:max(count, 1)]
+            self.free = self.free[len(tab_ids):]
+            lease_id = uuid.uuid4().hex
+            self.leases[lease_id] = tab_ids
+        
+        logger.info(f"租出 {len(tab_ids)} 个标签页 (租约 {lease_id[:8]}, 剩余空闲 {len(self.free)})")
+        return {'lease_id': lease_id, 'debug_port': self.scraper.debug_port, 'tab_ids': tab_ids}
+    
+    def release(self, lease_id: str):
+        """收回租约中的标签页"""
+        with self._lock:
+            tab_ids = self.leases.pop(lease_id, None)
+            if tab_ids:
+                self.free.extend(tab_ids)
+        if tab_ids:
+            logger.info(f"收回 {len(tab_ids)} 个标签页 (租约 {lease_id[:8]})")
+    
+    def status(self) -> Dict:
+        """返回标签页池状态"""
+        with self._lock:
+            return {
+                'free': len(self.free),
+                'leased': sum(len(ids) for ids in self.leases.values()),
+                'debug_port': self.scraper.debug_port if self.scraper else None,
+            }
+    
+    def _make_handler(self):
+        service = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                leases = []
+                try:
+                    for line in self.rfile:
+                        try:
+                            request = json.loads(line)
+                            response = self._dispatch(request, leases)
+                        except Exception as e:
+                            response = {'ok': False, 'error': str(e)}
+                        self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+                finally:
+                    # 连接断开，收回未归还的标签页
+                    for lease_id in leases:
+                        service.release(lease_id)
+            
+            def _dispatch(self, request: Dict, leases: List[str]) -> Dict:
+                op = request.get('op')
+                if op == 'lease':
+                    lease = service.lease(int(request.get('count', 1)))
+                    if lease is None:
+                        return {'ok': False, 'error': 'busy'}
+                    leases.append(lease['lease_id'])
+                    return {'ok': True, **lease}
+                if op == 'release':
+                    lease_id = request.get('lease_id')
+                    if lease_id in leases:
+                        leases.remove(lease_id)
+                        service.release(lease_id)
+                    return {'ok': True}
+                if op == 'status':
+                    return {'ok': True, **service.status()}
+                return {'ok': False, 'error': f'unknown op: {op}'}
+        
+        return Handler
+    
+    def serve_forever(self):
+        """监听本地端口处理租用请求，直到Ctrl+C"""
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', self.port), self._make_handler())
+        self._server.daemon_threads = True
+        logger.info(f"会话服务监听 127.0.0.1:{self.port}")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("收到中断信号，停止会话服务")
+        finally:
+            self._server.server_close()
+    
+    def shutdown(self):
+        """停止服务（从其他线程调用）"""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class SessionLease:
+    """
+    从会话服务租用的标签页
+    
+    持有与服务的连接，release()或连接断开时标签页归还给服务（标签页不关闭，保持预热状态）。
+    """
+    
+    def __init__(self, sock: socket.socket, lease_id: str, debug_port: int, tab_ids: List[str]):
+        self._sock = sock
+        self.lease_id = lease_id
+        self.debug_port = debug_port
+        self.tab_ids = tab_ids
+        
+        co = ChromiumOptions()
+        co.set_local_port(debug_port)
+        self.browser = Chromium(co)
+        self.tabs = [self.browser.get_tab(tab_id) for tab_id in tab_ids]
+    
+    def release(self):
+        """归还标签页"""
+        if self._sock is None:
+            return
+        try:
+            self._sock.sendall((json.dumps({'op': 'release', 'lease_id': self.lease_id}) + '\n').encode('utf-8'))
+            self._sock.makefile('r', encoding='utf-8').readline()
+        except OSError as e:
+            logger.debug(f"归还标签页时出错: {e}")
+        finally:
+            self._sock.close()
+            self._sock = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+def lease_tabs(count: int = 1, port: int = None) -> Optional[SessionLease]:
+    """
+    从会话服务租用标签页
+    
+    Args:
+        count: 需要的标签页数量（空闲标签页不足时返回较少的标签页）
+        port: 会话服务端口，默认使用config.SESSION_SERVICE_PORT
+    
+    Returns:
+        SessionLease，服务未运行或没有空闲标签页时返回None
+    """
+    if port is None:
+        port = config.SESSION_SERVICE_PORT
+    
+    try:
+        sock = socket.create_connection(('127.0.0.1', port), timeout=config.SESSION_SERVICE_TIMEOUT)
+    except OSError:
+        logger.debug(f"会话服务未运行 (端口: {port})")
+        return None
+    
+    try:
+        sock.settimeout(None)
+        sock.sendall((json.dumps({'op': 'lease', 'count': count}) + '\n').encode('utf-8'))
+        response = json.loads(sock.makefile('r', encoding='utf-8').readline() or '{}')
+        if not response.get('ok'):
+            logger.info(f"会话服务没有可用的标签页: {response.get('error')}")
+            sock.close()
+            return None
+        lease = SessionLease(sock, response['lease_id'], response['debug_port'], response['tab_ids'])
+    except Exception as e:
+        logger.warning(f"从会话服务租用标签页失败: {e}")
+        sock.close()
+        return None
+    
+    logger.info(f"从会话服务租用 {len(lease.tabs)} 个标签页 (浏览器端口: {lease.debug_port})")
+    return lease
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, config.LOG_LEVEL),
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(config.LOG_FILE, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    service = SessionService(int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    if service.start():
+        service.serve_forever()
+    else:
+        logger.error("无法连接到浏览器，会话服务未启动")
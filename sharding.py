@@ -0,0 +1,209 @@
+"""
+多浏览器分片模块
+启动或接管一组端口连续的Chrome实例（各自独立的用户数据目录），每个浏览器一个工作进程，
+商品列表按templateId分片后并行采集，最后合并为一个结果文件
+"""
+
+import argparse
+import csv
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import config
+from columnar import convert_results_csv
+from data_processor import CSV_FIELDNAMES, Item, ResultWriter, iter_items_csv
+from delta import write_delta
+from planner import build_plan
+
+
+logger = logging.getLogger(__name__)
+
+
+def shard_browser(index: int) -> Tuple[int, str]:
+    """
+    返回第index个分片使用的浏览器
+    
+    Returns:
+        (调试端口, 用户数据目录)，第0个分片沿用config中的端口和目录（保留已有登录状态）
+    """
+    port = config.CHROME_DEBUG_PORT + index
+    user_data_dir = config.CHROME_USER_DATA_DIR if index == 0 else f"{config.CHROME_USER_DATA_DIR}_{index}"
+    return port, user_data_dir
+
+
+def split_items(items: List[Item], shard_count: int) -> List[List[Item]]:
+    """
+    将商品分成shard_count份
+    
+    共享templateId的商品分到同一份（避免多个浏览器重复访问同一页面），
+    按页面数从多到少依次分给当前页面数最少的分片。
+    
+    Args:
+        items: build_plan生成的商品列表
+        shard_count: 分片数量
+    
+    Returns:
+        每个分片的商品列表（保持输入顺序）
+    """
+    # 用并查集把共享templateId的商品归为一组
+    parent: Dict[str, str] = {}
+    
+    def find(tid):
+        while parent.setdefault(tid, tid) != tid:
+            parent[tid] = parent[parent[tid]]
+            tid = parent[tid]
+        return tid
+    
+    for item in items:
+        ids = [tid for tid in (item.normal_id, item.dark_gold_id) if tid]
+        for tid in ids[1:]:
+            parent[find(tid)] = find(ids[0])
+    
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault(find(item.normal_id or item.dark_gold_id), []).append(index)
+    
+    def group_pages(indexes):
+        return len({tid for i in indexes for tid in (items[i].normal_id, items[i].dark_gold_id) if tid})
+    
+    loads = [0] * shard_count
+    assigned = [[] for _ in range(shard_count)]
+    for indexes in sorted(groups.values(), key=group_pages, reverse=True):
+        shard = loads.index(min(loads))
+        loads[shard] += group_pages(indexes)
+        assigned[shard].extend(indexes)
+    
+    return [[items[i] for i in sorted(indexes)] for indexes in assigned]
+
+
+def _write_items_csv(items: List[Item], filepath: str):
+    """按输入文件格式写出商品列表"""
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for item in items:
+            writer.writerow([item.name, item.normal_id, item.dark_gold_id])
+
+
+def _run_shard(index: int, items_csv: str, output_file: str, checkpoint_file: str, resume: bool) -> str:
+    """工作进程入口：连接分片对应的浏览器并采集分片商品列表"""
+    # 在子进程中导入，避免主进程加载浏览器相关模块
+    from scraper import YoupinScraper
+    
+    # 每个分片使用自己的浏览器，不从会话服务租用；增量文件和列式文件在合并后统一生成
+    config.USE_SESSION_SERVICE = False
+    config.DELTA_OUTPUT = False
+    config.COLUMNAR_OUTPUT = False
+    port, user_data_dir = shard_browser(index)
+    scraper = YoupinScraper(debug_port=port, user_data_dir=user_data_dir)
+    return scraper.run(items_csv, resume=resume, output_file=output_file, checkpoint_file=checkpoint_file)
+
+
+def merge_results(paths: List[str], writer: ResultWriter) -> int:
+    """
+    将各分片的结果文件追加到一个结果文件
+    
+    Args:
+        paths: 分片结果文件路径
+        writer: 合并后的结果写入器
+    
+    Returns:
+        合并的记录数量
+    """
+    count = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            if next(reader, None) != CSV_FIELDNAMES:
+                logger.warning(f"分片结果表头不一致，跳过: {path}")
+                continue
+            count += writer.write_rows(reader)
+    return count
+
+
+def run_sharded(items_csv: str = None, shard_count: int = None, resume: bool = False) -> str:
+    """
+    分片运行爬虫
+    
+    Args:
+        items_csv: 输入CSV文件路径
+        shard_count: 分片（浏览器）数量，默认使用config.SHARD_COUNT
+        resume: 是否从各分片的进度日志继续上次中断的采集（分片结果与商品列表不变时可续爬）
+    
+    Returns:
+        合并后的输出文件路径
+    """
+    if shard_count is None:
+        shard_count = config.SHARD_COUNT
+    
+    plan = build_plan(iter_items_csv(items_csv))
+    plan.log_summary()
+    if not plan.items:
+        logger.error("没有找到商品数据")
+        return ""
+    
+    shards = [items for items in split_items(plan.items, max(shard_count, 1)) if items]
+    os.makedirs(config.SHARD_DIR, exist_ok=True)
+    
+    jobs = []
+    for index, items in enumerate(shards):
+        port, _ = shard_browser(index)
+        shard_csv = os.path.join(config.SHARD_DIR, f"items_{index}.csv")
+        _write_items_csv(items, shard_csv)
+        jobs.append((index, shard_csv,
+                     os.path.join(config.SHARD_DIR, f"result_{index}.csv"),
+                     os.path.join(config.SHARD_DIR, f"progress_{index}.jsonl"),
+                     resume))
+        logger.info(f"分片 {index}: {len(items)} 个商品, 浏览器端口 {port}")
+    
+    outputs = []
+    with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = [executor.submit(_run_shard, *job) for job in jobs]
+        for index, future in enumerate(futures):
+            try:
+                output_file = future.result()
+            except Exception as e:
+                logger.error(f"分片 {index} 运行出错: {e}")
+                continue
+            if output_file:
+                outputs.append(output_file)
+            else:
+                logger.warning(f"分片 {index} 没有采集到数据")
+    
+    if not outputs:
+        logger.warning("没有采集到任何数据")
+        return ""
+    
+    with ResultWriter() as writer:
+        merge_results(outputs, writer)
+    for path in outputs:
+        os.remove(path)
+    
+    logger.info(f"已合并 {len(outputs)} 个分片的 {writer.count} 条记录到: {writer.output_file}")
+    if config.COLUMNAR_OUTPUT:
+        try:
+            logger.info(f"列式文件: {convert_results_csv(writer.output_file)}")
+        except ImportError:
+            logger.warning("未安装pyarrow，跳过列式输出（pip install pyarrow）")
+    if config.DELTA_OUTPUT:
+        write_delta(writer.output_file)
+    return writer.output_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CS2饰品价格爬虫 - 多浏览器分片运行")
+    parser.add_argument("items_csv", nargs="?", default=None, help="输入CSV文件路径（默认使用config.INPUT_CSV）")
+    parser.add_argument("--shards", type=int, default=None, help="浏览器/工作进程数量（默认使用config.SHARD_COUNT）")
+    parser.add_argument("--resume", action="store_true", help="从各分片的进度日志继续上次中断的采集")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=getattr(logging, config.LOG_LEVEL),
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(config.LOG_FILE, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    run_sharded(args.items_csv, args.shards, args.resume)
@@ -6,6 +6,21 @@
 import time
 from DrissionPage import ChromiumPage, ChromiumOptions
 import config
+from session_service import lease_tabs
+
+
+def connect_page():
+    """
+    连接浏览器：会话服务运行时租用一个已预热的标签页，否则接管调试端口上的浏览器
+    
+    Returns:
+        (页面对象, 租约)，未使用会话服务时租约为None（租约在进程退出时自动归还）
+    """
+    lease = lease_tabs(1) if config.USE_SESSION_SERVICE else None
+    if lease is not None:
+        return lease.tabs[0], lease
+    co = ChromiumOptions().set_local_port(config.CHROME_DEBUG_PORT)
+    return ChromiumPage(co), None
 
 
 def test_page_structure():
@@ -23,9 +38,8 @@ def test_page_structure():
     
     # 连接浏览器
     try:
-        co = ChromiumOptions().set_local_port(config.CHROME_DEBUG_PORT)
-        page = ChromiumPage(co)
-        print("\n成功连接到浏览器")
+        page, lease = connect_page()
+        print("\n成功连接到浏览器" + ("（会话服务）" if lease else ""))
     except Exception as e:
         print(f"\n连接浏览器失败: {e}")
         return
@@ -163,8 +177,7 @@ def interactive_test():
     print()
     
     try:
-        co = ChromiumOptions().set_local_port(config.CHROME_DEBUG_PORT)
-        page = ChromiumPage(co)
+        page, lease = connect_page()
     except Exception as e:
         print(f"连接浏览器失败: {e}")
         return